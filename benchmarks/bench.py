@@ -0,0 +1,299 @@
+"""Headless performance benchmarks for KittyKaboom.
+
+Runs scripted matches on the real stage layouts at several resolutions and
+reports ticks/frames per second, p50/p99 latency, peak Python memory and
+startup time. Two tiers are measured:
+
+* ``physics``: the ``physics.World`` simulation alone (terrain, tanks, balls).
+* ``widgets``: a full stage screen, including ``Wall``/``Ball`` widgets and
+  ``GameWidgetBase``, on Kivy's mock GL backend, so no GPU or display is needed.
+
+Usage::
+
+    python benchmarks/bench.py --output benchmarks/results/current.json
+    python benchmarks/bench.py --compare benchmarks/results/baseline.json
+
+With ``--compare`` the run fails (exit code 1) if any p99 latency, peak
+memory or startup time is more than ``--threshold`` worse than the baseline.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from headless import ROOT  # configures Kivy; must come before any Kivy import
+
+STAGES = ("stage1_1", "stage1_2")
+RESOLUTIONS = ((1280, 720), (1920, 1080), (2560, 1440))
+SHOT_ANGLES = (10, 35, 60, -20)
+FRAME_DT = 1.0 / 60.0
+MAX_FRAMES_PER_SHOT = 60 * 15
+
+# Differences below these are timer/allocator noise, not regressions
+NOISE_FLOOR = {"p99_ms": 0.1, "peak_kib": 64.0, "startup_ms": 2.0}
+
+
+def _stage_class(name):
+    if name == "stage1_1":
+        from scene.stage1_1 import Stage1_1
+        return Stage1_1
+    from scene.stage1_2 import Stage1_2
+    return Stage1_2
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    k = min(len(ordered) - 1, max(0, round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[k]
+
+
+def _summarize(samples_ms, startup_ms, peak_bytes, **extra):
+    mean = statistics.fmean(samples_ms) if samples_ms else 0.0
+    return dict(
+        frames=len(samples_ms),
+        fps=1000.0 / mean if mean else 0.0,
+        mean_ms=mean,
+        p50_ms=_percentile(samples_ms, 50),
+        p99_ms=_percentile(samples_ms, 99),
+        max_ms=max(samples_ms, default=0.0),
+        startup_ms=startup_ms,
+        peak_kib=peak_bytes / 1024.0,
+        **extra,
+    )
+
+
+def _aim(world, shot):
+    """Point the active tank's cannon at the next scripted angle and fire."""
+    world.active_tank.cannon_angle = SHOT_ANGLES[shot % len(SHOT_ANGLES)]
+    world.turn_timer = 0.0
+
+
+# --- physics tier ---
+def _build_world(wall_defs, width, height):
+    from kivy.metrics import dp
+    from physics import World, TankState
+    from stage_template import StageTemplate
+    from terrain import TerrainGrid, TerrainIndex, stage_wall_rects
+
+    rects = stage_wall_rects(wall_defs, width, height, StageTemplate.WALL_THICKNESS)
+    grids = [TerrainGrid.for_rect(x, y, w, h, dp(5)) for x, y, w, h in rects]
+    world = World([TankState("red"), TankState("blue")])
+    world.resize(width, height, height / 720)
+    world.layout_tanks(width, height)
+    world.terrain = TerrainIndex(grids, cell_size=dp(50))
+    return world
+
+
+def _drain_dirty(world):
+    """Drop the cleared spans, as each wall's ``sync`` does every frame in the game."""
+    for grid in world.terrain.grids:
+        grid.dirty.clear()
+
+
+def _play_world(world, shots, samples=None):
+    """Drop the tanks and fire ``shots`` scripted shots; optionally time each tick."""
+    clock = time.perf_counter
+    fired = 0
+    ticks = 0
+    while fired < shots and ticks < MAX_FRAMES_PER_SHOT * (shots + 1):
+        if world.turn_state == "INPUT":
+            _aim(world, fired)
+            fired += 1
+        start = clock()
+        world.step()
+        if samples is not None:
+            samples.append((clock() - start) * 1000.0)
+        _drain_dirty(world)
+        ticks += 1
+        if world.turn_state == "GAME_OVER":
+            break
+    # Let the last shot land
+    while world.balls and world.turn_state == "FIRING" and ticks < MAX_FRAMES_PER_SHOT * (shots + 2):
+        start = clock()
+        world.step()
+        if samples is not None:
+            samples.append((clock() - start) * 1000.0)
+        _drain_dirty(world)
+        ticks += 1
+    return ticks
+
+
+def bench_physics(stage, width, height, shots):
+    wall_defs = _stage_class(stage)(name=stage).wall_defs
+
+    start = time.perf_counter()
+    world = _build_world(wall_defs, width, height)
+    startup_ms = (time.perf_counter() - start) * 1000.0
+
+    samples = []
+    _play_world(world, shots, samples)
+
+    # Separate pass for memory: tracemalloc would distort the timings
+    gc.collect()
+    tracemalloc.start()
+    _play_world(_build_world(wall_defs, width, height), shots)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    blocks = sum(grid.cols * grid.rows for grid in world.terrain.grids)
+    return _summarize(samples, startup_ms, peak, blocks=blocks)
+
+
+# --- widgets tier ---
+def _enter_stage(stage, width, height):
+    from kivy.uix.screenmanager import ScreenManager
+    from game_system import stage_cache
+    # Measure a cold start, not a restart from the stage cache
+    stage_cache.clear()
+    screen = _stage_class(stage)(name=stage, size_hint=(None, None), size=(width, height))
+    # The first screen added becomes current, which enters it
+    ScreenManager().add_widget(screen)
+    return screen
+
+
+def _play_stage(screen, shots, samples=None):
+    clock = time.perf_counter
+    game = screen.game
+    world = game.world
+    fired = 0
+    frames = 0
+    limit = MAX_FRAMES_PER_SHOT * (shots + 2)
+    while frames < limit and world.turn_state != "GAME_OVER":
+        if world.turn_state == "INPUT":
+            if fired >= shots:
+                break
+            _aim(world, fired)
+            fired += 1
+        start = clock()
+        game.update_game_state(FRAME_DT)
+        if samples is not None:
+            samples.append((clock() - start) * 1000.0)
+        frames += 1
+    return frames
+
+
+def bench_widgets(stage, width, height, shots):
+    start = time.perf_counter()
+    screen = _enter_stage(stage, width, height)
+    startup_ms = (time.perf_counter() - start) * 1000.0
+
+    samples = []
+    try:
+        _play_stage(screen, shots, samples)
+    finally:
+        screen.on_leave()
+
+    gc.collect()
+    tracemalloc.start()
+    screen = _enter_stage(stage, width, height)
+    try:
+        _play_stage(screen, shots)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        screen.on_leave()
+        tracemalloc.stop()
+
+    return _summarize(samples, startup_ms, peak)
+
+
+TIERS = {"physics": bench_physics, "widgets": bench_widgets}
+
+
+def _git_revision():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, stderr=subprocess.DEVNULL,
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run(tiers, stages, resolutions, shots):
+    results = []
+    for tier in tiers:
+        for stage in stages:
+            for width, height in resolutions:
+                result = TIERS[tier](stage, width, height, shots)
+                result.update(tier=tier, stage=stage, resolution=f"{width}x{height}")
+                results.append(result)
+                print(
+                    f"{tier:<8} {stage:<9} {width}x{height:<5} "
+                    f"{result['fps']:9.0f} fps  p50 {result['p50_ms']:6.3f} ms  "
+                    f"p99 {result['p99_ms']:6.3f} ms  peak {result['peak_kib']:8.0f} KiB  "
+                    f"startup {result['startup_ms']:7.1f} ms"
+                )
+    return {
+        "meta": {
+            "revision": _git_revision(),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "shots": shots,
+        },
+        "results": results,
+    }
+
+
+def compare(report, baseline, threshold):
+    """Return a list of regressions of ``report`` against ``baseline``."""
+    def key(result):
+        return result["tier"], result["stage"], result["resolution"]
+
+    previous = {key(result): result for result in baseline["results"]}
+    regressions = []
+    for result in report["results"]:
+        old = previous.get(key(result))
+        if not old:
+            continue
+        for metric, floor in NOISE_FLOOR.items():
+            if result[metric] > max(old[metric] * (1 + threshold), old[metric] + floor):
+                regressions.append(
+                    f"{' '.join(key(result))}: {metric} {old[metric]:.3f} -> {result[metric]:.3f}"
+                )
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tier", choices=("physics", "widgets", "all"), default="all")
+    parser.add_argument("--stage", choices=STAGES, action="append")
+    parser.add_argument("--resolution", action="append", metavar="WxH",
+                        help="e.g. 1920x1080; repeatable (default: 720p, 1080p, 1440p)")
+    parser.add_argument("--shots", type=int, default=len(SHOT_ANGLES))
+    parser.add_argument("--output", help="write the JSON report here")
+    parser.add_argument("--compare", help="baseline JSON report to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.15,
+                        help="allowed relative slowdown before failing (default 0.15)")
+    args = parser.parse_args(argv)
+
+    tiers = list(TIERS) if args.tier == "all" else [args.tier]
+    resolutions = (
+        [tuple(int(v) for v in res.lower().split("x")) for res in args.resolution]
+        if args.resolution else RESOLUTIONS
+    )
+    report = run(tiers, args.stage or STAGES, resolutions, args.shots)
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=1)
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(report, json.load(f), args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
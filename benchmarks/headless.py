@@ -0,0 +1,18 @@
+"""Run the game's modules without a display, for the benchmark scripts.
+
+Import this before anything from Kivy or ``source/``: it selects Kivy's
+mock GL backend and an offscreen SDL window, and puts ``source/`` on the
+import path.
+"""
+import os
+import sys
+
+# Kivy must be configured before it is first imported
+os.environ.setdefault("KIVY_GL_BACKEND", "mock")
+os.environ.setdefault("SDL_VIDEODRIVER", "offscreen")
+os.environ.setdefault("KIVY_NO_ARGS", "1")
+os.environ.setdefault("KIVY_NO_CONSOLELOG", "1")
+os.environ.setdefault("KIVY_LOG_MODE", "PYTHON")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "source"))
@@ -0,0 +1,116 @@
+"""Replay recorded matches headlessly and check they reproduce.
+
+Each replay is re-simulated through ``GameWidgetBase.update_game_state``
+on Kivy's mock GL backend, fast-forwarded and with drawing throttled, and
+its turn switches and final checksum are compared with the recording.
+
+With ``--check`` it first records a scripted match of its own, resized
+part-way through with the walls re-rasterized some ticks later (as the
+debounced rebuild does on a device), and verifies that too.
+
+Usage::
+
+    python benchmarks/replay.py replays/*.kkr
+    python benchmarks/replay.py --speed 32 --render-every 0 match.kkr
+    python benchmarks/replay.py --check
+
+Exit status is 1 if any replay diverged.
+"""
+import argparse
+import importlib
+import os
+import sys
+import time
+
+import headless  # noqa: F401 (configures Kivy; must come before any Kivy import)
+
+TICK = 1.0 / 60.0
+# Scripted match for --check: (stage, size, resized size, resize tick, rebuild tick, ticks)
+CHECK_MATCH = ("stage1_1", (1280, 720), (1920, 1080), 500, 520, 2000)
+
+
+def _stage_screen(stage, width, height, colors=("red", "blue")):
+    from kivy.uix.screenmanager import ScreenManager
+    from main import SCREENS
+
+    module_name, class_name = SCREENS[stage]
+    stage_class = getattr(importlib.import_module(module_name), class_name)
+    manager = ScreenManager()
+    manager.p1_tank_color, manager.p2_tank_color = colors
+    screen = stage_class(name=stage, size_hint=(None, None), size=(width, height))
+    return manager, screen
+
+
+def record_check_match():
+    """Record ``CHECK_MATCH`` and return its ``Replay``."""
+    from replay import Replay
+
+    stage, (width, height), new_size, resize_at, rebuild_at, ticks = CHECK_MATCH
+    manager, screen = _stage_screen(stage, width, height)
+    manager.add_widget(screen)
+    game = screen.game
+    game.start_recording(stage)
+    for tick in range(ticks):
+        if tick == resize_at:
+            game.size = new_size
+        if tick == rebuild_at:
+            # Stand-in for the REBUILD_DELAY timer firing at this point
+            screen._rebuild_event.cancel()
+            screen._on_rebuild_timer(0)
+        # Turn the cannon for a while each turn, then let the timer fire it
+        game.controls.press(*(("up",) if game.world.turn_timer > 8.0 else ()))
+        game.update_game_state(TICK)
+        if game.world.turn_state == "GAME_OVER":
+            break
+    replay = game.recorder.finish(game.world)
+    game.recorder = None
+    screen.on_leave()
+    # Round trip, so the check covers the file format too
+    return Replay.from_bytes(replay.to_bytes())
+
+
+def play(replay, speed, render_every):
+    """Re-simulate one replay; return (ok, ticks, seconds)."""
+    manager, screen = _stage_screen(replay.stage, replay.width, replay.height, replay.colors)
+
+    start = time.perf_counter()
+    manager.add_widget(screen)  # enters the stage
+    game = screen.game
+    # 0 means never draw until the end
+    game.play_replay(replay, speed=speed, render_every=render_every or 1 << 30)
+    while game.player:
+        game.update_game_state(TICK)
+    elapsed = time.perf_counter() - start
+    screen.on_leave()
+    return game.replay_ok, replay.ticks, elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("replays", nargs="*")
+    parser.add_argument("--speed", type=int, default=16, help="ticks simulated per frame (default 16)")
+    parser.add_argument("--render-every", type=int, default=0,
+                        help="redraw widgets every N frames; 0 = only at the end (default)")
+    parser.add_argument("--check", action="store_true",
+                        help="also record and verify a scripted match resized part-way through")
+    args = parser.parse_args(argv)
+    if not args.replays and not args.check:
+        parser.error("give replay files and/or --check")
+
+    from replay import Replay
+
+    replays = [(os.path.basename(path), Replay.load(path)) for path in args.replays]
+    if args.check:
+        replays.insert(0, ("resize check", record_check_match()))
+    failed = 0
+    for name, replay in replays:
+        ok, ticks, elapsed = play(replay, args.speed, args.render_every)
+        failed += not ok
+        realtime = ticks * TICK
+        print(f"{'OK  ' if ok else 'FAIL'} {name}: {replay.stage} "
+              f"{ticks} ticks in {elapsed:.2f}s ({realtime / elapsed if elapsed else 0:.0f}x real time)")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
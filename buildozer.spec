@@ -15,7 +15,7 @@ source.dir = source
 #source.dir = .
 
 # (list) Source files to include (let empty to include all the files)
-source.include_exts = py,png,jpg,jpeg,kv,atlas,mp3,wav,ogg
+source.include_exts = py,png,jpg,jpeg,kv,atlas,mp3,wav,ogg,json,kks
 
 # (list) List of inclusions using pattern matching
 source.include_patterns = resource/*, resource/**/*
@@ -39,7 +39,7 @@ version = 0.1
 
 # (list) Application requirements
 # comma separated e.g. requirements = sqlite3,kivy
-requirements = python3,kivy,plyer,pyjnius
+requirements = python3,kivy,plyer,pyjnius,numpy
 
 # (str) Custom source folders for requirements
 # Sets custom source for any requirements with recipes
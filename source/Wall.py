@@ -1,81 +1,246 @@
-from kivy.uix.widget import Widget
-from kivy.graphics import Rectangle, Color
-import math
-
-class Wall(Widget):
-    def __init__(self, pos=(0,0), size=(200,100), block_size=20, **kwargs):
-        super().__init__(**kwargs)
-        self.block_size = block_size
-        self.blocks = []
-        self.pos = pos
-        self.size = size
-        self.rebuild_blocks()
-
-    def rebuild_blocks(self):
-        # Prevent zero size
-        if self.width == 0 or self.height == 0:
-            return
-
-        # Clear old blocks
-        for block in self.blocks:
-            self.remove_widget(block)
-        self.blocks.clear()
-
-        bx_count = max(1, int(self.width / self.block_size))
-        by_count = max(1, int(self.height / self.block_size))
-
-        # Center of the wall for gradient
-        cx = self.x + self.width / 2
-        cy = self.y + self.height / 2
-        max_dist = math.sqrt((self.width/2)**2 + (self.height/2)**2)
-        if max_dist == 0:
-            max_dist = 1  # safeguard
-
-        for i in range(bx_count):
-            for j in range(by_count):
-                x = self.x + i * self.block_size
-                y = self.y + j * self.block_size
-                block = Widget(pos=(x, y), size=(self.block_size, self.block_size))
-
-                # Distance from center
-                bx_center = x + self.block_size / 2
-                by_center = y + self.block_size / 2
-                dist = math.sqrt((bx_center - cx)**2 + (by_center - cy)**2)
-                edge_factor = min(1.0, dist / max_dist)  # 0=center, 1=edge
-
-                # Radial gradient: center brown → edge green
-                r = 0.4 * (1 - edge_factor) + 0.1 * edge_factor
-                g = 0.25 * (1 - edge_factor) + 0.6 * edge_factor
-                b = 0.1
-                a = 1.0
-
-                with block.canvas:
-                    Color(r, g, b, a)
-                    block.rect = Rectangle(pos=block.pos, size=block.size)
-
-                block.bind(pos=self.update_block, size=self.update_block)
-                self.add_widget(block)
-                self.blocks.append(block)
-
-    def update_block(self, instance, value):
-        instance.rect.pos = instance.pos
-        instance.rect.size = instance.size
-
-    def destroy_at(self, point, radius=15):
-        """Destroy blocks intersecting a circular area"""
-        to_remove = []
-        for block in self.blocks:
-            bx, by = block.center
-            dx = bx - point[0]
-            dy = by - point[1]
-            if dx*dx + dy*dy <= radius*radius:
-                to_remove.append(block)
-
-        for block in to_remove:
-            self.remove_widget(block)
-            self.blocks.remove(block)
-
-    @staticmethod
-    def wall_collides(widget, wall):
-        """Return True if widget collides with any block of the wall."""
-        return any(widget.collide_widget(block) for block in wall.blocks)
+from kivy.uix.widget import Widget
+from kivy.graphics import Rectangle, Color
+from kivy.graphics.texture import Texture
+
+import leaks
+from assets import ATLAS_WIDTH, ATLAS_MAX_HEIGHT, pack_shelves
+from terrain import TerrainGrid, radial_gradient, resample
+
+
+class Wall(Widget):
+    """Destructible wall backed by an occupancy bitmap.
+
+    Each block is one byte in ``self.grid`` and one texel in a texture, so
+    the whole wall draws with a single textured Rectangle. A wall draws from
+    its slot in the stage's ``TerrainAtlas`` when it has one, or from a small
+    texture of its own. The grid holds all collision state; the widget only
+    mirrors it on screen, re-uploading just the texels a crater changed.
+
+    Resizing is split in two: ``relayout`` just stretches the existing grid
+    and texture to the new rectangle, while ``rebuild_blocks`` re-rasterizes
+    at the new resolution and keeps any craters already carved.
+    """
+    def __init__(self, pos=(0,0), size=(200,100), block_size=20, **kwargs):
+        super().__init__(**kwargs)
+        self.block_size = block_size
+        self.grid = TerrainGrid(0, 0)
+        self._pixels = bytearray()
+        self._texture = None
+        self._texture_pos = (0, 0)
+        # Set by TerrainAtlas.update; None draws from a texture of its own
+        self.atlas = None
+        self._raster_size = (0, 0)
+        # (cells, pixels) as rasterized, so reset() can undo craters cheaply
+        self._pristine = None
+        self.pos = pos
+        self.size = size
+
+        with self.canvas:
+            Color(1, 1, 1, 1)
+            self.rect = Rectangle(pos=self.pos, size=(0, 0))
+
+        self.rebuild_blocks()
+        leaks.track(self)
+
+    def rebuild_blocks(self, raster=None):
+        """Rasterize the wall at its current size.
+
+        ``raster`` is an optional precompiled ``stage_format.Raster`` for
+        this size; it is used instead of computing the gradient if it matches.
+        """
+        # Prevent zero size
+        if self.width == 0 or self.height == 0:
+            return
+
+        old_grid = self.grid
+        self.grid = TerrainGrid.for_rect(self.x, self.y, self.width, self.height, self.block_size)
+        bx_count, by_count = self.grid.cols, self.grid.rows
+        self._raster_size = (self.width, self.height)
+        if raster is not None and (raster.cols, raster.rows) == (bx_count, by_count):
+            self.grid.cells, self._pixels = raster.load()
+            self.grid.alive = self.grid.cells.count(1)
+        else:
+            self._pixels = radial_gradient(bx_count, by_count, self.block_size, self.width, self.height)
+        self._pristine = (bytes(self.grid.cells), bytes(self._pixels))
+
+        # Keep craters from the previous raster
+        if old_grid.cols:
+            resample(old_grid, self.grid)
+            for idx, solid in enumerate(self.grid.cells):
+                if not solid:
+                    self._pixels[idx * 4 + 3] = 0
+
+        self.rect.pos = self.pos
+        self.rect.size = (bx_count * self.block_size, by_count * self.block_size)
+        if self.atlas is None:
+            self.attach()
+        elif self._texture is not None and (bx_count, by_count) == (old_grid.cols, old_grid.rows):
+            # Same resolution, so the slot still fits (the atlas won't repack)
+            self.attach(self._texture, self._texture_pos)
+        else:
+            # The old slot is the wrong size now; the atlas hands out a new one
+            self._texture = None
+
+    def reset(self):
+        """Restore every block cleared since the wall was rasterized."""
+        if self._pristine is None:
+            return
+        cells, pixels = self._pristine
+        grid = self.grid
+        grid.cells[:] = cells
+        grid.alive = cells.count(1)
+        grid.dirty.clear()
+        grid.version += 1
+        self._pixels[:] = pixels
+        if self._texture is not None:
+            self._upload(0, 0, grid.cols - 1, grid.rows - 1)
+
+    def cache_cost(self):
+        """Bytes of terrain this wall keeps in memory."""
+        return 2 * (len(self.grid.cells) + len(self._pixels))
+
+    def needs_rebuild(self):
+        """True if the wall was stretched since it was last rasterized."""
+        return (self.width, self.height) != self._raster_size
+
+    def relayout(self, raster=None):
+        """Fit the existing grid and texture to the wall's current rectangle.
+
+        Only the transform changes: no blocks are regenerated and craters stay.
+        The first call rasterizes the wall (from ``raster`` if given).
+        """
+        if not self.grid.cols:
+            self.rebuild_blocks(raster)
+            return
+        raster_w, raster_h = self._raster_size
+        cell_w = self.block_size * self.width / raster_w
+        cell_h = self.block_size * self.height / raster_h
+        self.grid.place(self.x, self.y, cell_w, cell_h, rect=(self.x, self.y, self.width, self.height))
+        self.rect.pos = self.pos
+        self.rect.size = (self.grid.cols * cell_w, self.grid.rows * cell_h)
+
+    def attach(self, texture=None, pos=(0, 0)):
+        """Draw from the block-sized region at ``pos`` of ``texture`` and fill it.
+
+        With no texture the wall gets one of its own.
+        """
+        cols, rows = self.grid.cols, self.grid.rows
+        if texture is None:
+            # One texel per block; nearest filtering keeps block edges crisp
+            texture = Texture.create(size=(cols, rows), colorfmt="rgba")
+            texture.mag_filter = "nearest"
+            texture.min_filter = "nearest"
+            region, pos = texture, (0, 0)
+        else:
+            region = texture.get_region(pos[0], pos[1], cols, rows)
+        self._texture = texture
+        self._texture_pos = pos
+        self.rect.texture = region
+        self._upload(0, 0, cols - 1, rows - 1)
+
+    def _upload(self, i0, j0, i1, j1):
+        """Copy the texels of cells (i0, j0)..(i1, j1) to the GPU."""
+        cols = self.grid.cols
+        pixels = self._pixels
+        if i0 == 0 and i1 == cols - 1:
+            data = bytes(pixels[j0 * cols * 4:(j1 + 1) * cols * 4])
+        else:
+            data = b"".join(
+                pixels[(j * cols + i0) * 4:(j * cols + i1 + 1) * 4] for j in range(j0, j1 + 1)
+            )
+        x, y = self._texture_pos
+        self._texture.blit_buffer(
+            data, pos=(x + i0, y + j0), size=(i1 - i0 + 1, j1 - j0 + 1),
+            colorfmt="rgba", bufferfmt="ubyte",
+        )
+        self.canvas.ask_update()
+
+    def sync(self):
+        """Hide blocks cleared from the grid since the last call.
+
+        Only the rectangle around the cleared spans is uploaded. Cheap when
+        nothing changed, so it can run every frame.
+        """
+        grid = self.grid
+        if not grid.dirty:
+            return
+        pixels = self._pixels
+        i_min, j_min, i_max, j_max = grid.cols, grid.rows, -1, -1
+        for j, i0, i1 in grid.dirty:
+            start = grid.index(i0, j) * 4 + 3
+            pixels[start:start + (i1 - i0 + 1) * 4:4] = bytes(i1 - i0 + 1)
+            i_min, i_max = min(i_min, i0), max(i_max, i1)
+            j_min, j_max = min(j_min, j), max(j_max, j)
+        grid.dirty.clear()
+        if self._texture is not None:
+            self._upload(i_min, j_min, i_max, j_max)
+
+    def bounds(self):
+        """Return (x, y, right, top) of the area covered by blocks."""
+        return self.grid.bounds()
+
+    def collides_rect(self, x, y, right, top):
+        """Return True if any solid block touches the rectangle."""
+        return self.grid.collides_rect(x, y, right, top)
+
+    def carve(self, point, radius):
+        """Clear every block whose center lies within the circle and redraw.
+
+        Return the number of blocks destroyed; when it's 0 nothing is redrawn.
+        """
+        destroyed = self.grid.carve(point, radius)
+        if destroyed:
+            self.sync()
+        return destroyed
+
+    def destroy_at(self, point, radius=15):
+        """Destroy blocks intersecting a circular area. Return how many were destroyed."""
+        return self.carve(point, radius)
+
+    @staticmethod
+    def wall_collides(widget, wall):
+        """Return True if widget collides with any block of the wall."""
+        return wall.grid.collides_rect(widget.x, widget.y, widget.right, widget.top)
+
+
+class TerrainAtlas:
+    """One RGBA texture holding the texels of every wall in a stage.
+
+    Walls are packed onto shelves like sprite atlases, so the terrain draws
+    from a single GPU texture however many walls and blocks there are, and a
+    crater uploads only its own sub-rectangle.
+    """
+    PADDING = 1
+
+    def __init__(self):
+        self.texture = None
+        self._sizes = {}
+
+    def update(self, walls):
+        """Repack if any wall changed resolution; return True if it did.
+
+        Walls that don't fit keep a texture of their own.
+        """
+        sizes = {
+            i: (wall.grid.cols, wall.grid.rows) for i, wall in enumerate(walls)
+            if 0 < wall.grid.cols <= ATLAS_WIDTH
+        }
+        if sizes == self._sizes and all(wall.atlas is self for wall in walls):
+            return False
+        positions, used_height = pack_shelves(sizes, ATLAS_WIDTH, ATLAS_MAX_HEIGHT, self.PADDING)
+        self.texture = None
+        if positions:
+            height = 1
+            while height < used_height:
+                height *= 2
+            self.texture = Texture.create(size=(ATLAS_WIDTH, height), colorfmt="rgba")
+            self.texture.mag_filter = "nearest"
+            self.texture.min_filter = "nearest"
+        for i, wall in enumerate(walls):
+            wall.atlas = self
+            if i in positions:
+                wall.attach(self.texture, positions[i])
+            elif wall.grid.cols:
+                wall.attach()
+        self._sizes = sizes
+        return True
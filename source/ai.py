@@ -0,0 +1,229 @@
+"""CPU opponent: searches (movement, angle) pairs against a copy of the world.
+
+On its turn the AI pickles the ``World`` and hands the copy to an executor
+(one background thread by default, or a process pool). Each task drives the
+tank for one candidate movement up to the moment the turn timer fires, then
+tries every reachable cannon angle from there and scores where the shot
+lands. The game thread only checks whether results are in.
+
+The chosen shot is played back as ordinary per-tick input (``set_input``),
+so the tank moves and aims through the same ``_drive_tank`` /
+``rotate_cannon`` / ``launch_salvo`` path a human uses, and recorded
+matches replay exactly. The copy is stepped with the same input sequence,
+including the ticks spent thinking, so the shot plays out as simulated.
+"""
+import math
+import pickle
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from physics import CANNON_LIMIT, TICK
+
+# Score of a shot that hits a tank; everything else scores minus its closest approach
+HIT_SCORE = 1e6
+
+
+class Shot:
+    """A planned turn: drive with ``ax`` for ``move_ticks``, turn the cannon ``rotate`` for ``rotate_ticks``."""
+    __slots__ = ("score", "hit", "ax", "move_ticks", "rotate", "rotate_ticks")
+
+    def __init__(self, score=-math.inf, hit=False, ax=0, move_ticks=0, rotate=0, rotate_ticks=0):
+        self.score = score
+        self.hit = hit
+        self.ax = ax
+        self.move_ticks = move_ticks
+        self.rotate = rotate
+        self.rotate_ticks = rotate_ticks
+
+    def input(self, k):
+        """Input for the ``k``-th tick of the plan."""
+        return (self.ax if k < self.move_ticks else 0,
+                self.rotate if k < self.rotate_ticks else 0)
+
+
+def _score_flight(world, player, max_ticks):
+    """Fire from ``world`` and return (score, hit) for the opponent ``player`` aims at."""
+    world.set_input(0, 0)
+    targets = [tank.center for i, tank in enumerate(world.tanks) if i != player]
+    closest = math.inf
+    for _ in range(max_ticks):
+        for event in world.step(TICK):
+            if event[0] == "hit":
+                return (HIT_SCORE, True) if event[1] != player else (-HIT_SCORE, False)
+        for ball in world.balls:
+            bx, by = ball.center
+            for tx, ty in targets:
+                closest = min(closest, math.hypot(tx - bx, ty - by))
+        if world.turn_state != "FIRING":
+            break
+    return -closest, False
+
+
+def _evaluate_move(snapshot, player, delay, ax, move_ticks, rotations, deadline, max_flight_ticks):
+    """Score every (rotate, ticks) in ``rotations`` after driving ``move_ticks`` with ``ax``.
+
+    Runs in a worker. Stops early once ``deadline`` (``time.time()``) has
+    passed and returns what it has as a list of ``Shot``.
+    """
+    world = pickle.loads(snapshot)
+    # Hold still while the search runs, then drive until the timer fires
+    k = 0
+    while world.turn_state == "INPUT" and world.turn_timer - TICK * world.scale_y > 0:
+        world.set_input(ax if delay <= k < delay + move_ticks else 0, 0)
+        world.step(TICK)
+        k += 1
+    if world.turn_state != "INPUT":
+        return []
+    available = k - delay
+    before_fire = pickle.dumps(world, pickle.HIGHEST_PROTOCOL)
+
+    shots = []
+    for rotate, ticks in rotations:
+        if ticks > available:
+            continue
+        if time.time() > deadline:
+            break
+        trial = pickle.loads(before_fire)
+        tank = trial.tanks[player]
+        for _ in range(ticks):
+            tank.rotate_cannon(rotate * trial.cannon_angle_speed)
+        score, hit = _score_flight(trial, player, max_flight_ticks)
+        shots.append(Shot(score, hit, ax, move_ticks, rotate, ticks))
+        # Let the game thread run between candidates
+        time.sleep(0)
+    return shots
+
+
+def _rotations(angle, speed, limit, step):
+    """(rotate, ticks) pairs reaching cannon angles ``step`` degrees apart, nearest first."""
+    pairs = [(0, 0)]
+    up = int((limit - angle) / speed) if speed > 0 else 0
+    down = int((limit + angle) / speed) if speed > 0 else 0
+    stride = max(1, round(step / speed)) if speed > 0 else 1
+    for ticks in range(stride, max(up, down) + 1, stride):
+        if ticks <= up:
+            pairs.append((1, ticks))
+        if ticks <= down:
+            pairs.append((-1, ticks))
+    return pairs
+
+
+class ShotSearch:
+    """One turn's search, running on ``executor``; collect it with ``best``."""
+
+    def __init__(self, world, player, executor, deadline, delay, moves, angle_step, max_flight_ticks):
+        profiler, world.profiler = world.profiler, None
+        try:
+            snapshot = pickle.dumps(world, pickle.HIGHEST_PROTOCOL)
+        finally:
+            world.profiler = profiler
+        tank = world.tanks[player]
+        rotations = _rotations(tank.cannon_angle, world.cannon_angle_speed, CANNON_LIMIT, angle_step)
+        self.deadline = time.time() + deadline
+        self.futures = [
+            executor.submit(
+                _evaluate_move, snapshot, player, delay, 1 if move > 0 else -1, abs(move),
+                rotations, self.deadline, max_flight_ticks,
+            )
+            for move in moves
+        ]
+
+    @property
+    def done(self):
+        return all(future.done() for future in self.futures)
+
+    def best(self):
+        """Best shot found so far (None if nothing finished); stops the rest of the search."""
+        best = None
+        for future in self.futures:
+            if not future.done():
+                future.cancel()
+                continue
+            if future.cancelled() or future.exception() is not None:
+                continue
+            for shot in future.result():
+                # Ties keep the earliest candidate: least movement, least turning
+                if best is None or shot.score > best.score:
+                    best = shot
+        return best
+
+
+class AIController:
+    """Plays tank ``player`` (0-based) by feeding the world input each tick.
+
+    ``deadline`` is the thinking time in seconds. With ``processes`` > 0 the
+    search runs in that many worker processes; otherwise on one background
+    thread. ``log`` (optional) gets an ``info`` line per planned shot.
+    """
+    # Candidate drives in ticks (sign = direction), most conservative first
+    MOVES = (0, 15, -15, 30, -30, 60, -60)
+    ANGLE_STEP = 4
+    MAX_FLIGHT_TICKS = 600
+
+    def __init__(self, player, deadline=1.0, processes=0, log=None):
+        self.player = player
+        self.deadline = deadline
+        self.processes = processes
+        self.log = log
+        self.last_shot = None
+        self._executor = None
+        self._search = None
+        self._shot = None
+        self._tick = None
+        # Ticks the tank waits while thinking; the plan starts after them
+        self._delay = math.ceil(deadline / TICK) + 1
+
+    def tick(self, world):
+        """Set this tick's input if it is our turn; call right before ``World.step``.
+
+        Return True if the AI is in control of this tick.
+        """
+        if world.turn_state != "INPUT" or world.current_turn != self.player:
+            self._end_turn()
+            return False
+        if self._tick is None:
+            self._search = ShotSearch(
+                world, self.player, self._get_executor(), self.deadline, self._delay,
+                self.MOVES, self.ANGLE_STEP, self.MAX_FLIGHT_TICKS,
+            )
+            self._tick = 0
+
+        k = self._tick
+        self._tick += 1
+        if k < self._delay:
+            world.set_input(0, 0)
+            return True
+        if self._shot is None:
+            self._shot = self._search.best() or Shot()
+            self._search = None
+            self.last_shot = self._shot
+            if self.log:
+                self.log.info(self._describe(world, self._shot))
+        world.set_input(*self._shot.input(k - self._delay))
+        return True
+
+    def close(self):
+        """Stop searching and shut the workers down."""
+        self._end_turn()
+        if self._executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _end_turn(self):
+        if self._search:
+            self._search.best()
+        self._search = self._shot = self._tick = None
+
+    def _get_executor(self):
+        if self._executor is None:
+            if self.processes > 0:
+                self._executor = ProcessPoolExecutor(max_workers=self.processes)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ShotSearch")
+        return self._executor
+
+    def _describe(self, world, shot):
+        angle = world.tanks[self.player].cannon_angle + shot.rotate * shot.rotate_ticks * world.cannon_angle_speed
+        move = shot.move_ticks * shot.ax
+        outcome = "hit" if shot.hit else f"miss by {-shot.score:.0f}px"
+        return f"🤖 Tank {self.player + 1} aims {angle:.0f}°, drives {move:+d} ticks ({outcome})"
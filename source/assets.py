@@ -0,0 +1,240 @@
+"""Shared textures for sprites and UI images.
+
+Images are decoded on a background thread while the welcome screen plays,
+then uploaded one per frame. Sprites are packed into an atlas texture,
+so both tanks in a stage draw from one GPU texture; sprites too big for
+a slot are scaled down to fit first. Other images get a texture of their
+own. Widgets ask for textures by resource path (``"tankImage/red/body.png"``)
+and get the same shared object every time, so entering a stage after
+preloading reads no files.
+"""
+import os
+import threading
+from collections import deque
+
+from kivy.clock import Clock
+from kivy.core.image import ImageData, ImageLoader
+from kivy.graphics.texture import Texture
+
+RESOURCE_DIR = os.path.join(os.path.dirname(__file__), "resource")
+
+TANK_COLORS = ("red", "yellow", "green", "blue")
+# Everything the menus and stages show after the welcome screen
+PRELOAD = tuple(
+    f"tankImage/{color}/{part}.png"
+    for color in TANK_COLORS for part in ("body", "cannon", "full")
+)
+
+ATLAS_WIDTH = 2048
+ATLAS_MAX_HEIGHT = 2048
+# Larger sprites are scaled down to this before they get a slot in the atlas
+ATLAS_MAX_SPRITE = 512
+# Gap between sprites so linear filtering doesn't bleed neighbours in
+ATLAS_PADDING = 2
+
+
+def resource_path(name):
+    return os.path.join(RESOURCE_DIR, *name.split("/"))
+
+
+def _decode(name):
+    """Read and decode an image file into an ImageData (safe off the main thread)."""
+    return ImageLoader.load(resource_path(name), keep_data=True, nocache=True)._data[0]
+
+
+def _box_resize(pixels, axis, size):
+    """Area-average float ``pixels`` along ``axis`` down to ``size`` samples.
+
+    Each output sample is the mean over its exact (fractional) span of
+    input samples, read off running sums. ``pixels`` is overwritten.
+    """
+    import numpy as np
+
+    n = pixels.shape[axis]
+    sums = np.cumsum(pixels, axis=axis, out=pixels)
+    edges = np.linspace(0.0, n, size + 1)
+    k = np.minimum(edges.astype(int), n - 1)
+    shape = [1] * pixels.ndim
+    shape[axis] = size + 1
+    frac = (edges - k).reshape(shape)
+    # Sum of the first k samples, then the part of sample k before the edge
+    upper = np.take(sums, k, axis=axis)
+    lower = np.take(sums, np.maximum(k - 1, 0), axis=axis)
+    lower *= (k > 0).reshape(shape)
+    upper -= lower
+    upper *= frac
+    lower += upper
+    return np.diff(lower, axis=axis) * (size / n)
+
+
+def _fit_sprite(data, limit=ATLAS_MAX_SPRITE):
+    """Return RGBA ``data`` scaled down to fit ``limit`` x ``limit`` (as is if it already does)."""
+    if data.fmt != "rgba" or max(data.width, data.height) <= limit:
+        return data
+    # Only needed for oversized sprites, on the decode thread: keep it off cold start
+    import numpy as np
+
+    scale = limit / max(data.width, data.height)
+    width, height = max(1, round(data.width * scale)), max(1, round(data.height * scale))
+    stride = data.rowlength or data.width * 4
+    rows = np.frombuffer(data.data, dtype=np.uint8).reshape(data.height, stride)
+    pixels = rows[:, :data.width * 4].reshape(data.height, data.width, 4).astype(np.float32)
+    # Average with premultiplied alpha so transparent texels don't darken the edges
+    alpha = pixels[:, :, 3:] / 255.0
+    pixels[:, :, :3] *= alpha
+    pixels = _box_resize(_box_resize(pixels, 0, height), 1, width)
+    alpha = pixels[:, :, 3:] / 255.0
+    np.divide(pixels[:, :, :3], alpha, out=pixels[:, :, :3], where=alpha > 0)
+    pixels = np.clip(np.rint(pixels), 0, 255).astype(np.uint8)
+    return ImageData(width, height, "rgba", pixels.tobytes(), source=data.source,
+                     flip_vertical=data.flip_vertical)
+
+
+def _upload(data, texture=None, pos=(0, 0)):
+    """Copy decoded pixels into ``texture`` (a new one if None) and return it."""
+    if texture is None:
+        texture = Texture.create(size=(data.width, data.height), colorfmt=data.fmt)
+    texture.blit_buffer(
+        data.data, pos=pos, size=(data.width, data.height), colorfmt=data.fmt,
+        bufferfmt="ubyte", rowlength=data.rowlength,
+    )
+    return texture
+
+
+def pack_shelves(sizes, width=ATLAS_WIDTH, max_height=ATLAS_MAX_HEIGHT, padding=ATLAS_PADDING):
+    """Place rectangles on shelves, tallest first.
+
+    ``sizes`` maps name -> (w, h). Return ({name: (x, y)}, used_height);
+    names that don't fit are left out.
+    """
+    positions = {}
+    x = y = shelf_h = 0
+    for name, (w, h) in sorted(sizes.items(), key=lambda item: (-item[1][1], item[0])):
+        if x + w > width:
+            x, y, shelf_h = 0, y + shelf_h + padding, 0
+        if y + h > max_height:
+            continue
+        positions[name] = (x, y)
+        x += w + padding
+        shelf_h = max(shelf_h, h)
+    return positions, y + shelf_h
+
+
+class AssetManager:
+    """Loads each image once and hands out shared textures."""
+
+    def __init__(self):
+        self._textures = {}
+        self._decoded = {}
+        self._uploads = deque()
+        self._atlas = None
+        self._atlas_slots = {}
+        self._loader = None
+        self._upload_event = None
+        self._on_done = []
+
+    @property
+    def loading(self):
+        return self._loader is not None or bool(self._uploads)
+
+    def texture(self, name):
+        """Return the shared texture for ``name``, loading it now if needed."""
+        texture = self._textures.get(name)
+        if texture is not None:
+            return texture
+        if name in self._decoded:
+            # Decoded but still queued: upload it ahead of the others
+            return self._upload_one(name)
+        # Not preloaded (yet): read it synchronously into a texture of its own
+        texture = self._textures[name] = self._flipped(_upload(_decode(name)))
+        return texture
+
+    def preload(self, names=PRELOAD, on_done=None):
+        """Decode ``names`` in the background and upload them over the next frames.
+
+        ``on_done`` is called on the main thread once every texture is ready.
+        """
+        if on_done:
+            self._on_done.append(on_done)
+        if self.loading:
+            return
+        names = [name for name in names if name not in self._textures]
+        if not names:
+            self._finish()
+            return
+        self._loader = threading.Thread(target=self._decode_all, args=(names,), daemon=True)
+        self._loader.start()
+        self._upload_event = Clock.schedule_interval(self._upload_step, 0)
+
+    # --- Background thread ---
+    def _decode_all(self, names):
+        for name in names:
+            try:
+                self._decoded[name] = _fit_sprite(_decode(name))
+            except Exception:
+                # Leave it to texture() to load (and report) on demand
+                pass
+
+    # --- Main thread ---
+    def _upload_step(self, dt):
+        """Upload one image per frame; lay the atlas out once decoding is done."""
+        if self._loader is not None:
+            if self._loader.is_alive():
+                return
+            self._loader = None
+            self._plan_uploads()
+        while self._uploads:
+            if self._uploads[0] in self._decoded:
+                self._upload_one(self._uploads.popleft())
+                return
+            self._uploads.popleft()
+        self._upload_event.cancel()
+        self._upload_event = None
+        self._finish()
+
+    def _plan_uploads(self):
+        """Give sprites atlas slots and queue every decoded image for upload."""
+        # Anything already loaded on demand keeps the texture it was handed out as
+        for name in self._textures:
+            self._decoded.pop(name, None)
+        small = {
+            name: (data.width, data.height) for name, data in self._decoded.items()
+            if data.width <= ATLAS_MAX_SPRITE and data.height <= ATLAS_MAX_SPRITE
+        }
+        self._atlas_slots, used_height = pack_shelves(small)
+        if len(self._atlas_slots) > 1:
+            height = 1
+            while height < used_height:
+                height *= 2
+            self._atlas = Texture.create(size=(ATLAS_WIDTH, height), colorfmt="rgba")
+        else:
+            self._atlas, self._atlas_slots = None, {}
+        self._uploads.extend(self._decoded)
+
+    def _upload_one(self, name):
+        data = self._decoded.pop(name)
+        slot = self._atlas_slots.get(name)
+        if slot is not None and data.fmt == "rgba":
+            _upload(data, self._atlas, slot)
+            texture = self._atlas.get_region(slot[0], slot[1], data.width, data.height)
+        else:
+            texture = _upload(data)
+        texture = self._textures[name] = self._flipped(texture)
+        return texture
+
+    @staticmethod
+    def _flipped(texture):
+        # Decoded rows run top to bottom
+        texture.flip_vertical()
+        return texture
+
+    def _finish(self):
+        callbacks, self._on_done = self._on_done, []
+        for callback in callbacks:
+            callback()
+
+
+# Shared by every screen
+manager = AssetManager()
+texture = manager.texture
+preload = manager.preload
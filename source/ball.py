@@ -1,224 +1,169 @@
 import math
 from kivy.uix.widget import Widget
 from kivy.vector import Vector
-from kivy.graphics import Ellipse, Color, InstructionGroup
+from kivy.graphics import Ellipse, Color, Rectangle
+from kivy.graphics.texture import Texture
 from kivy.uix.label import Label
 import time
 
+import leaks
+
+NUM_ELLIPSES = 40       # rings in the original gradient
+GRADIENT_EXTENT = 1.2   # rings grow up to 1.2x the ball size at animation peak
+GRADIENT_TEXELS = 48    # texture width/height of one baked gradient
+SPEED_BUCKETS = 32
+PHASE_BUCKETS = 16
+RADIAL_SAMPLES = 64
+
+
+# (speed bucket, phase bucket) -> Texture, shared by every ball
+_gradient_cache = {}
+_texel_sample_cache = []
+
+
+def _texel_samples():
+    """Radius sample index for every texel, row by row (computed once)."""
+    if not _texel_sample_cache:
+        half = GRADIENT_TEXELS / 2
+        for y in range(GRADIENT_TEXELS):
+            dy = y + 0.5 - half
+            for x in range(GRADIENT_TEXELS):
+                dx = x + 0.5 - half
+                rho = math.sqrt(dx * dx + dy * dy) / half  # 1.0 == GRADIENT_EXTENT
+                _texel_sample_cache.append(int(rho * (RADIAL_SAMPLES - 1) + 0.5))
+    return _texel_sample_cache
+
+
+def _speed_color(norm_speed):
+    """Green -> blue -> red as the ball speeds up."""
+    if norm_speed < 0.3:
+        t = norm_speed / 0.3
+        return 0.0, 1.0 - t, t # Green (1.0) -> Blue (1.0)
+    t = (norm_speed - 0.3) / 0.7
+    return t, 0.0, 1.0 - t
+
+
+def gradient_texture(speed_bucket, phase_bucket):
+    """Return the baked gradient texture for a quantized speed and phase.
+
+    Reproduces the 40 concentric ellipses the ball used to draw each frame:
+    rings are painted largest-progress first, so a texel takes the color of
+    the last (innermost-progress) ring that covers it.
+    """
+    key = (speed_bucket, phase_bucket)
+    texture = _gradient_cache.get(key)
+    if texture is not None:
+        return texture
+
+    interp_r, interp_g, interp_b = _speed_color(speed_bucket / (SPEED_BUCKETS - 1))
+    phase = phase_bucket / PHASE_BUCKETS * 2 * math.pi
+    size_factors = []
+    for i in range(1, NUM_ELLIPSES + 1):
+        progress = i / NUM_ELLIPSES
+        size_factors.append(progress * (math.sin(phase + progress * 15) * 0.2 + 1.0))
+
+    # Rings are radially symmetric, so resolve one color per radius sample
+    # and look texels up by their distance from the center.
+    profile = []
+    for k in range(RADIAL_SAMPLES):
+        rho = k / (RADIAL_SAMPLES - 1) * GRADIENT_EXTENT
+        texel = b"\x00\x00\x00\x00"
+        for size_factor in size_factors:
+            if rho <= size_factor:
+                # GL clamps colors above 1.0, so do the same here
+                level = min(size_factor, 1.0) * 255
+                texel = bytes((int(interp_r * level), int(interp_g * level), int(interp_b * level), 255))
+                break
+        profile.append(texel)
+    pixels = b"".join(profile[k] if k < RADIAL_SAMPLES else b"\x00\x00\x00\x00" for k in _texel_samples())
+
+    texture = Texture.create(size=(GRADIENT_TEXELS, GRADIENT_TEXELS), colorfmt="rgba")
+    texture.blit_buffer(pixels, colorfmt="rgba", bufferfmt="ubyte")
+    _gradient_cache[key] = texture
+    return texture
+
+
 class Ball(Widget):
-    """The projectile ball, updated for physics, gravity, and firing state."""
+    """The projectile ball on screen.
+
+    Physics lives in ``physics.BallState``; ``sync`` copies the simulated
+    position and speed onto the widget each frame.
+    """
     velocity = Vector(0, 0)
     gravity_scale = 0.0  
     fired = False  
 
-    def __init__(self, **kwargs):
+    def __init__(self, state=None, **kwargs):
         super().__init__(**kwargs)
-        self.bounce_count = 0  # Initialize bounce counter
+        self.state = state
+        self.owner = None
+        leaks.track(self)
         self.size = (20, 20)
         self.center_x = self.x 
         self.center_y = self.y
         
         self.fired = False 
         self.velocity = Vector(0, 0)
-        self.gravity_scale = 0.0 # Will be set by GameWidgetBase
-        self.friction = 0.99
-        self.bounce_limit = 2
-        self.bounce_count = 0
 
         # Draw the base ball
         with self.canvas:
             self.outer_color = Color(1, 1, 1, 0)
             self.outer_ellipse = Ellipse(pos=self.pos, size=self.size)
 
-        # InstructionGroup for the gradient to allow easy clearing and redrawing
-        self.gradient_group = InstructionGroup()
-        self.canvas.add(self.gradient_group)
+        # Pre-baked gradient drawn as a single textured rectangle
+        with self.canvas:
+            Color(1, 1, 1, 1)
+            self.gradient_rect = Rectangle(pos=self.pos, size=(0, 0))
 
-        self.time_offset = time.time()
+        self._pick_phase()
         self.bind(pos=self.update_graphics, size=self.update_graphics)
 
+    def _pick_phase(self):
+        self.time_offset = time.time()
+        # The animation phase is fixed per ball, so quantize it once
+        phase = (self.time_offset * 5) % (2 * math.pi)
+        self.phase_bucket = int(phase / (2 * math.pi) * PHASE_BUCKETS) % PHASE_BUCKETS
+        self.speed_bucket = None
+
+    def reset(self, state=None):
+        """Reuse this widget (and its canvas) for another projectile."""
+        self.state = state
+        self.owner = None
+        self.fired = False
+        self.velocity = Vector(0, 0)
+        self._pick_phase()
+        self.gradient_rect.size = (0, 0)
+
     def update_graphics(self, *args):
         """Updates the position and size of the outer ellipse."""
         self.outer_ellipse.pos = self.pos
         self.outer_ellipse.size = self.size
 
-    def update(self, dt, walls, bounce_factor):
-        """Moves the ball and calculates new physics state."""
-        if not self.fired:
-            # If the ball is not fired, it should not update.
-            return
-            
-        # 1. Apply Gravity
-        self.velocity.y += self.gravity_scale
-        '''self.pos = (
-            self.x + self.velocity.x,
-            self.y + self.velocity.y,
-        )'''
-
-        # 2. Apply Position Update
-        new_pos = self.pos[0] + self.velocity.x, self.pos[1] + self.velocity.y
-        old_x, old_y = self.x, self.y       
-
-        # 3. Apply Friction (Air Resistance)
-        self.velocity.x *= self.friction
-        self.velocity.y *= self.friction
-
-        # 4. Check Window Bounds (Floor and Screen Edges)
-        if new_pos[1] < 0: # Floor collision
-            new_pos = new_pos[0], 0
-            self.velocity.y = -self.velocity.y * bounce_factor
-            self.velocity.x *= 0.8 # Additional ground friction
-            self.bounce_count += 1
-            
-            # CRITICAL TERMINATION 1: Ball settles on the ground
-            if abs(self.velocity.y) < 1 and abs(self.velocity.x) < 1:
-                self.velocity = Vector(0, 0)
-                self.fired = False # <--- MUST BE SET TO FALSE
-                return # Stop processing
-                
-        if new_pos[0] < 0 or new_pos[0] + self.width > self.parent.width:
-            # Side wall collision
-            self.velocity.x = -self.velocity.x * bounce_factor
-            new_pos = (max(0, min(new_pos[0], self.parent.width - self.width)), new_pos[1])
-            self.bounce_count += 1
-
-        # 7. Check Wall collision with destructible walls
-        # Horizontal movement
-        self.x = new_pos[0]
-
-        for wall in walls:
-            # If wall is destructible
-            if hasattr(wall, "blocks"):
-                for block in wall.blocks[:]:  # copy to avoid modifying while iterating
-                    if self.collide_widget(block):
-                        # Destroy the block at ball's position
-                        wall.destroy_at(self.center, radius=15)
-                        
-                        # Bounce horizontally
-                        self.x = old_x
-                        self.velocity.x *= -bounce_factor
-                        self.bounce_count += 1
-                        break  # only one block per frame
-
-        # Vertical movement
-        self.y = new_pos[1]
-
-        for wall in walls:
-            if hasattr(wall, "blocks"):
-                for block in wall.blocks[:]:
-                    if self.collide_widget(block):
-                        # Destroy the block at ball's position
-                        wall.destroy_at(self.center, radius=15)
-                        
-                        # Bounce vertically
-                        self.y = old_y
-                        self.velocity.y *= -bounce_factor
-                        
-                        # Optional: stop if settling
-                        if abs(self.velocity.y) < 1:
-                            self.velocity.y = 0
-                        
-                        self.bounce_count += 1
-                        break
-
-        # Re-calculate new_pos based on corrected collision results
-        new_pos = self.x, self.y
-                
-        # 6. Check Termination Conditions (Two-Bounce Limit)
-        if self.bounce_count >= self.bounce_limit:
-            self.velocity = Vector(0, 0)
-            self.fired = False # <--- MUST BE SET TO FALSE
-            return # Stop processing
-
-        # 7. Apply new position
-        self.pos = new_pos
-        
-        # 8. Update ball color
-        self.draw_gradient() 
-        
+    def sync(self, alpha=1.0):
+        """Mirror the simulated ball (``self.state``) and redraw its gradient.
+
+        ``alpha`` interpolates between the last two physics ticks.
+        """
+        state = self.state
+        self.velocity.x = state.vx
+        self.velocity.y = state.vy
+        self.fired = state.fired
+        self.pos = state.lerp_pos(alpha)
+        self.draw_gradient()
+
     def draw_gradient(self):
         """
         Draws the dynamic, animated gradient inside the ball.
-        (Logic kept from user's original input)
+        Uses a cached texture for the current speed bucket instead of
+        rebuilding 40 Ellipses every frame.
         """
-        self.gradient_group.clear()
-        
         speed = self.velocity.length()
         norm_speed = min(speed / 25.0, 1.0)
-
-        if norm_speed < 0.3:
-            t = norm_speed / 0.3
-            interp_r, interp_g, interp_b = 0.0, 1.0 - t, t # Green (1.0) -> Blue (1.0)
-        else:
-            t = (norm_speed - 0.3) / 0.7
-            interp_r, interp_g, interp_b = t, 0.0, 1.0 - t
-
-        num_ellipses = 40
-
-        for i in range(num_ellipses, 0, -1):
-            progress = i / num_ellipses
-            animation_factor = math.sin(self.time_offset * 5 + progress * 15) * 0.2 + 1.0
-            size_factor = progress * animation_factor
-            
-            r, g, b = interp_r * size_factor, interp_g * size_factor, interp_b * size_factor
-            
-            ring_size = (self.width * size_factor, self.height * size_factor)
-            ring_pos = (
-                self.center_x - ring_size[0] / 2.0,
-                self.center_y - ring_size[1] / 2.0
-            )
-
-            self.gradient_group.add(Color(r, g, b, 1.0))
-            self.gradient_group.add(Ellipse(pos=ring_pos, size=ring_size))
-
-
-    def move(self, bounce_factor, walls):
-        """
-        Moves the ball and handles bouncing from walls and window edges.
-        If the ball settles (velocity near zero at the bottom), stop firing.
-        """
-        if not self.parent: return
-    
-        old_x, old_y = self.x, self.y
-    
-        # ---- Move X ----
-        self.x += self.velocity.x
-        collided_x = any(self.collide_widget(w) for w in walls)
-        if collided_x:
-            self.x = old_x
-            self.velocity.x *= -bounce_factor
-            self.bounce_count += 1
-    
-        # ---- Move Y ----
-        self.y += self.velocity.y
-        collided_y = any(self.collide_widget(w) for w in walls)
-        if collided_y:
-            self.y = old_y
-            self.velocity.y *= -bounce_factor
-            self.bounce_count += 1
-    
-        # ---- Window bounds ----
-        if self.x < 0:
-            self.x = 0
-            self.velocity.x *= -bounce_factor
-        elif self.right > self.parent.width:
-            self.right = self.parent.width
-            self.velocity.x *= -bounce_factor
-    
-        if self.y < 50: # Assuming 50 is the ground wall height
-            self.y = 50 
-            self.velocity.y *= -bounce_factor
-            
-            # --- Bounce Logic ---
-            self.bounce_count += 1  # <--- Increment Bounce Count
-            
-            # Stop if ball settles (existing logic)
-            if abs(self.velocity.y) < 1 and abs(self.velocity.x) < 1:
-                 self.velocity = Vector(0, 0)
-                 self.fired = False 
-                 
-        # --- NEW: Two-Bounce Limit ---
-        if self.bounce_count >= 2:
-            self.velocity = Vector(0, 0)
-            self.fired = False  # Signal end of turn and removal
-            return
\ No newline at end of file
+        speed_bucket = int(round(norm_speed * (SPEED_BUCKETS - 1)))
+        if speed_bucket != self.speed_bucket:
+            self.speed_bucket = speed_bucket
+            self.gradient_rect.texture = gradient_texture(speed_bucket, self.phase_bucket)
+
+        size = (self.width * GRADIENT_EXTENT, self.height * GRADIENT_EXTENT)
+        self.gradient_rect.size = size
+        self.gradient_rect.pos = (self.center_x - size[0] / 2.0, self.center_y - size[1] / 2.0)
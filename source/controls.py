@@ -0,0 +1,162 @@
+"""Player controls: held keys and the accelerometer, turned into world input.
+
+The game loop never polls a device. Key events and accelerometer samples
+update ``Controls.state``, an ``(ax, rotate)`` tuple the loop reads once per
+frame. Keys update it as they are pressed and released. The accelerometer
+is read by its own Clock event at ``rate`` samples per second rather than
+every frame, so the plyer/JNI call costs ``rate`` round-trips a second
+however fast the game renders. Samples are smoothed with an exponential
+moving average, and tilts inside a dead zone count as level.
+"""
+from kivy.clock import Clock
+from kivy.core.window import Window
+from plyer import accelerometer
+
+# Tilt (m/s^2) to tank acceleration, and the side tilt that turns the cannon
+TILT_SPEED = 0.3
+TILT_ROTATE = 1.5
+
+
+class Controls:
+    """Input for the active tank on ``platform`` ("android" uses the accelerometer).
+
+    ``rate`` is in samples per second; ``smoothing`` (0-1] is the weight of
+    each new sample, 1 meaning no smoothing; tilts under ``dead_zone``
+    m/s^2 are ignored. ``on_press(name)`` (optional) sees every key press
+    and ``on_change()`` (optional) every change of ``state``.
+    ``start`` and ``stop`` bind and release the devices.
+    """
+    # Seconds between start() and enabling the sensor, so it isn't started
+    # while the screen transition is still running
+    ENABLE_DELAY = 2
+
+    # Key names by keycode, shared by all instances
+    _key_names = {}
+
+    def __init__(self, platform, rate=30, smoothing=0.5, dead_zone=0.5, on_press=None, on_change=None, log=None):
+        self.platform = platform
+        self.rate = rate
+        self.smoothing = smoothing
+        self.dead_zone = dead_zone
+        self.on_press = on_press
+        self.on_change = on_change
+        self.log = log
+        self.state = (0, 0)
+        self.samples = 0
+        self._keys = set()
+        self._tilt = None
+        self._enable_event = None
+        self._sample_event = None
+        self._bound = False
+        self._enabled = False
+
+    # --- Lifecycle ---
+    def start(self):
+        if self._bound:
+            return
+        self._bound = True
+        if self.platform == "android":
+            self._enable_event = Clock.schedule_once(self._enable, self.ENABLE_DELAY)
+        else:
+            Window.bind(on_key_down=self._on_key_down, on_key_up=self._on_key_up)
+
+    def stop(self):
+        """Release the keyboard or sensor and return to neutral input."""
+        if self._bound:
+            if self.platform == "android":
+                for event in (self._enable_event, self._sample_event):
+                    if event:
+                        event.cancel()
+                self._enable_event = self._sample_event = None
+                if self._enabled:
+                    try:
+                        accelerometer.disable()
+                    except Exception as e:
+                        self._warn(f"⚠ Failed to disable accelerometer: {e}")
+                    self._enabled = False
+            else:
+                Window.unbind(on_key_down=self._on_key_down, on_key_up=self._on_key_up)
+            self._bound = False
+        self._keys.clear()
+        self._tilt = None
+        self.state = (0, 0)
+
+    def press(self, *names):
+        """Hold ``names`` down (and release everything else), as the keyboard would."""
+        self._keys = set(names)
+        self._update_keys()
+
+    # --- Accelerometer ---
+    def _enable(self, dt):
+        self._enable_event = None
+        try:
+            accelerometer.enable()
+        except Exception as e:
+            self._warn(f"⚠ Failed to enable accelerometer: {e}")
+            return
+        self._enabled = True
+        self._sample_event = Clock.schedule_interval(self._sample, 1.0 / self.rate)
+
+    def _sample(self, dt):
+        try:
+            accel = accelerometer.acceleration
+        except Exception:
+            return
+        if not accel or any(a is None for a in accel[:2]):
+            return
+        self.samples += 1
+        x, y = accel[0], accel[1]
+        if self._tilt is None:
+            self._tilt = (x, y)
+        else:
+            k = self.smoothing
+            sx, sy = self._tilt
+            self._tilt = (sx + k * (x - sx), sy + k * (y - sy))
+        self._publish(self._from_tilt(*self._tilt))
+
+    def _from_tilt(self, x, y):
+        ax = y * TILT_SPEED if abs(y) >= self.dead_zone else 0
+        rotate = 0
+        if x > TILT_ROTATE:
+            rotate = 1
+        elif x < -TILT_ROTATE:
+            rotate = -1
+        return ax, rotate
+
+    # --- Keyboard ---
+    def _on_key_down(self, window, key, *args):
+        name = self._key_name(key)
+        if self.on_press:
+            self.on_press(name)
+        self._keys.add(name)
+        self._update_keys()
+
+    def _on_key_up(self, window, key, *args):
+        self._keys.discard(self._key_name(key))
+        self._update_keys()
+
+    def _key_name(self, key):
+        name = self._key_names.get(key)
+        if name is None:
+            name = self._key_names[key] = Window._system_keyboard.keycode_to_string(key)
+        return name
+
+    def _update_keys(self):
+        keys = self._keys
+        ax = 0
+        rotate = 0
+        if "left" in keys:  ax -= 1.0
+        if "right" in keys: ax += 1.0
+        if "up" in keys:    rotate += 1
+        if "down" in keys:  rotate -= 1
+        self._publish((ax, rotate))
+
+    def _publish(self, state):
+        if state != self.state:
+            self.state = state
+            if self.on_change:
+                self.on_change()
+
+    def _warn(self, message):
+        if self.log:
+            self.log.warning(message)
@@ -1,8 +1,9 @@
-import os
 from kivy.uix.widget import Widget
 from kivy.uix.image import Image
 from kivy.graphics import PushMatrix, PopMatrix, Scale, Rotate
 
+import assets
+
 
 class FullTank(Widget):
     """Tank widget with a body and a rotatable cannon, supporting horizontal flip."""
@@ -11,18 +12,14 @@ class FullTank(Widget):
         super().__init__(**kwargs)
         self.size = (100, 100)
 
-        # Paths
-        base_path = os.path.join(os.path.dirname(__file__), "resource", "tankImage", color)
-        body_path = os.path.join(base_path, "body.png")
-        cannon_path = os.path.join(base_path, "cannon.png")
         self.color_name = color
 
-        # Tank body
-        self.body = Image(source=body_path, fit_mode="contain")
+        # Tank body (shared atlas textures: no file I/O once preloaded)
+        self.body = Image(texture=assets.texture(f"tankImage/{color}/body.png"), fit_mode="contain")
         self.add_widget(self.body)
 
         # Tank cannon
-        self.cannon = Image(source=cannon_path, fit_mode="contain")
+        self.cannon = Image(texture=assets.texture(f"tankImage/{color}/cannon.png"), fit_mode="contain")
         self.add_widget(self.cannon)
 
         # Cannon rotation
@@ -71,8 +68,14 @@ class FullTank(Widget):
 
     def rotate_cannon(self, delta_angle: float):
         """Rotate cannon within -80° to +80°."""
-        self.cannon_angle = max(-80, min(80, self.cannon_angle + delta_angle))
-        self._cannon_rotate.angle = self.cannon_angle
+        self.set_cannon_angle(max(-80, min(80, self.cannon_angle + delta_angle)))
+
+    def set_cannon_angle(self, angle: float):
+        """Point the cannon at an absolute angle."""
+        if angle == self.cannon_angle:
+            return
+        self.cannon_angle = angle
+        self._cannon_rotate.angle = angle
 
     def collide_widget(self, other_widget):
         """Use circular collision instead of rectangular."""
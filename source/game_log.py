@@ -0,0 +1,186 @@
+"""In-game log: a bounded ring buffer for the HUD plus an off-thread echo.
+
+``GameLog.log`` only appends to a ring buffer and hands the line to a
+writer thread, so logging from the game loop never touches a Kivy label or
+blocks on console/file I/O. The HUD polls ``version`` once per frame and
+redraws only when it changed.
+"""
+import atexit
+import queue
+import sys
+import threading
+import time
+from collections import deque
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+
+LEVEL_NAMES = {DEBUG: "DEBUG", INFO: "INFO", WARNING: "WARNING", ERROR: "ERROR"}
+
+
+def parse_level(value, default=INFO):
+    """Accept a level number or name ("debug", "WARNING"...)."""
+    if isinstance(value, int):
+        return value
+    for level, name in LEVEL_NAMES.items():
+        if str(value).upper() == name:
+            return level
+    return default
+
+
+class GameLog:
+    """Keeps the last ``capacity`` messages and echoes every message off-thread.
+
+    ``echo`` is a text stream (the real stdout by default) and ``path`` an
+    optional file to append to. Lines queued faster than the writer can
+    keep up with are dropped rather than stalling the caller; the drop
+    count is reported once the writer catches up.
+    """
+    def __init__(self, capacity=10, level=INFO, echo=None, path=None, backlog=1000):
+        self.level = level
+        self.entries = deque(maxlen=capacity)
+        self.version = 0
+        self.dropped = 0
+        # Both threads update ``dropped``
+        self._dropped_lock = threading.Lock()
+        self.echo = echo if echo is not None else sys.__stdout__
+        self.path = path
+        self._queue = queue.Queue(maxsize=backlog)
+        self._writer = None
+
+    # --- Game thread side ---
+    def log(self, level, message):
+        if level < self.level:
+            return
+        message = str(message).rstrip()
+        if not message.strip():
+            return
+        self.entries.append((level, message))
+        self.version += 1
+        if self._writer is None:
+            self._start_writer()
+        try:
+            self._queue.put_nowait((time.time(), level, message))
+        except queue.Full:
+            with self._dropped_lock:
+                self.dropped += 1
+
+    def debug(self, message):
+        self.log(DEBUG, message)
+
+    def info(self, message):
+        self.log(INFO, message)
+
+    def warning(self, message):
+        self.log(WARNING, message)
+
+    def error(self, message):
+        self.log(ERROR, message)
+
+    def clear(self):
+        """Empty the visible entries (echoed lines are unaffected)."""
+        self.entries.clear()
+        self.version += 1
+
+    def lines(self):
+        """Visible (level, text) entries, oldest first."""
+        return list(self.entries)
+
+    def close(self, timeout=1.0):
+        """Flush what is queued and stop the writer thread."""
+        if self._writer is None:
+            return
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            pass
+        self._writer.join(timeout)
+        self._writer = None
+        atexit.unregister(self.close)
+
+    # --- Writer thread ---
+    def _start_writer(self):
+        self._writer = threading.Thread(target=self._drain, name="GameLogWriter", daemon=True)
+        self._writer.start()
+        # Don't lose the last lines (e.g. a traceback) if the app exits first
+        atexit.register(self.close)
+
+    def _drain(self):
+        file = None
+        if self.path:
+            try:
+                file = open(self.path, "a", encoding="utf-8")
+            except OSError:
+                file = None
+        try:
+            while True:
+                item = self._queue.get()
+                if item is None:
+                    break
+                stamp, level, message = item
+                if self.dropped:
+                    with self._dropped_lock:
+                        dropped, self.dropped = self.dropped, 0
+                    self._emit(file, stamp, WARNING, f"{dropped} log lines dropped")
+                self._emit(file, stamp, level, message)
+        finally:
+            if file:
+                file.close()
+
+    def _emit(self, file, stamp, level, message):
+        if self.echo is not None:
+            try:
+                self.echo.write(message + "\n")
+                self.echo.flush()
+            except (OSError, ValueError):
+                pass
+        if file:
+            clock = time.strftime("%H:%M:%S", time.localtime(stamp))
+            file.write(f"{clock} {LEVEL_NAMES.get(level, level)} {message}\n")
+            file.flush()
+
+
+class LogStream:
+    """File-like object that turns ``print`` output into ``GameLog`` lines.
+
+    ``install`` swaps it in for ``sys.stdout`` (or ``sys.stderr``) and
+    ``restore`` puts the original stream back.
+    """
+    def __init__(self, log, level=INFO):
+        self.log = log
+        self.level = level
+        self._partial = ""
+        self._original = None
+        self._name = None
+
+    def write(self, text):
+        # print() writes the message and the newline separately; join them back
+        *lines, self._partial = (self._partial + text).split("\n")
+        for line in lines:
+            self.log.log(self.level, line)
+        return len(text)
+
+    def flush(self):
+        if self._partial:
+            self.log.log(self.level, self._partial)
+            self._partial = ""
+
+    def isatty(self):
+        return False
+
+    def install(self, name="stdout"):
+        self._name = name
+        self._original = getattr(sys, name)
+        setattr(sys, name, self)
+        return self
+
+    def restore(self):
+        if self._name is None:
+            return
+        self.flush()
+        # Only put the original back if nobody replaced us in the meantime
+        if getattr(sys, self._name) is self:
+            setattr(sys, self._name, self._original)
+        self._name = self._original = None
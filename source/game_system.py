@@ -4,49 +4,74 @@ from kivy.uix.widget import Widget
 from kivy.core.window import Window
 from kivy.uix.label import Label
 from kivy.uix.button import Button
-from plyer import accelerometer
+from kivy.app import App
 from kivy.utils import platform as core_platform
-from kivy.vector import Vector
-from kivy.graphics import Color, Rectangle
-from collections import deque
+from kivy.graphics import Color, Line, Rectangle
 import math
+import os
+import random
 import sys
+import time
 
 from full_tank import FullTank
 from ball import Ball
+from physics import World, TankState, FixedTimestep
+from profiler import FrameProfiler
+from pool import LRUCache, ObjectPool
+from replay import Replay, ReplayPlayer, ReplayRecorder
+from game_log import GameLog, LogStream, WARNING, ERROR, parse_level
+from trajectory import TrajectoryPredictor
+from ai import AIController
+from controls import Controls
+import leaks
 
 
 class BaseStage(Screen):
     """
     Base game stage screen.
-    Handles setup, game loop, and accelerometer control on Android.
+    Handles setup, the game loop and its teardown.
     """
+    # Left stages stay built for a quick restart: at most this many, holding
+    # at most this many bytes of terrain (see stage_cache)
+    CACHE_SIZE = 3
+    CACHE_BYTES = 32 * 1024 * 1024
+
+    game = None
+    back_btn = None
+
     def on_enter(self, *args):
         # Create game widget
         p1_color = self.manager.p1_tank_color if hasattr(self.manager, 'p1_tank_color') else 'red'
         p2_color = self.manager.p2_tank_color if hasattr(self.manager, 'p2_tank_color') else 'blue'
 
-        
-        self.game = GameWidgetBase(p1_color,p2_color)
+        # Replaying a stage reuses its widgets; only the match state is reset
+        self._cache_key = (self.name, p1_color, p2_color)
+        self.game = stage_cache.pop(self._cache_key)
+        if self.game is None:
+            self.game = GameWidgetBase(p1_color,p2_color)
+        else:
+            self.game.reset()
         self.add_widget(self.game)
-
-        # Back button
-        self.back_btn = Button(
-            text="Back",
-            size_hint=(None, None),
-            size=(100, 50),
-            pos=(self.width - 110, 10)
-        )
-        self.add_widget(self.back_btn)
-        self.back_btn.bind(on_release=self.go_back)
+        # Start at the screen's size so the stage is laid out once, not at the default 100x100
+        self.game.size = self.size
+        self.game.bind_input()
+
+        # Back button (built once; it stays on the screen between visits)
+        if self.back_btn is None:
+            self.back_btn = Button(
+                text="Back",
+                size_hint=(None, None),
+                size=(100, 50),
+            )
+            self.back_btn.bind(on_release=self.go_back)
+            self.add_widget(self.back_btn)
+        self._reposition_button()
         self.bind(size=self._reposition_button)
 
-        # Enable accelerometer on Android
-        if core_platform == "android":
-            Clock.schedule_once(self._enable_accel, 2)
+        if self.game.RECORD:
+            self.game.start_recording(self.name)
 
-        # Run game loop at 60 FPS
-        Clock.schedule_interval(self.game.update_game_state, 1.0 / 60.0)
+        self.game.start_loop()
 
     def _reposition_button(self, *args):
         """Reposition back button when window resizes."""
@@ -56,23 +81,50 @@ class BaseStage(Screen):
         """Return to title screen."""
         self.manager.current = "title"
 
-    def _enable_accel(self, dt):
-        """Enable accelerometer on Android (if available)."""
-        try:
-            accelerometer.enable()
-        except Exception as e:
-            print(f"⚠ Failed to enable accelerometer: {e}")
-
     def on_leave(self, *args):
-        """Cleanup when leaving stage."""
-        if core_platform == "android":
-            try:
-                accelerometer.disable()
-            except Exception as e:
-                print(f"⚠ Failed to disable accelerometer: {e}")
-
-        Clock.unschedule(self.game.update_game_state)
+        """Cleanup when leaving stage: undo everything on_enter bound or scheduled."""
+        if self.game is None:
+            # Left before it was entered (e.g. during a screen transition)
+            return
+        self.unbind(size=self._reposition_button)
+        self.game.stop_loop()
+        self.game.unbind_input()
+        if self.game.profiler:
+            self.game.export_profile(self.name)
+        if self.game.recorder:
+            self.game.save_recording()
+        if self.game.ai:
+            self.game.ai.close()
+        self.game.close_log()
         self.remove_widget(self.game)
+        # The cache decides how long the game stays alive, not this screen
+        stage_cache.put(self._cache_key, self.game)
+        self.game = None
+
+        if leaks.tracker:
+            self.report_leaks()
+
+    def report_leaks(self):
+        """Print live game objects and handlers against what the stage cache holds."""
+        counts = leaks.tracker.counts()
+        cached = stage_cache.values()
+        expected = {
+            "GameWidgetBase": len(cached),
+            "Wall": sum(len(game.walls) for game in cached),
+            "Ball": sum(len(game.balls) + len(game.ball_pool) for game in cached),
+        }
+        handlers = (
+            leaks.bound_callbacks(Window, ("on_key_down", "on_key_up"), Controls)
+            + leaks.bound_callbacks(self, ("size",), BaseStage)
+            + sum(leaks.bound_callbacks(game, ("size", "pos"), BaseStage) for game in cached)
+            + leaks.scheduled_callbacks(Clock, (GameWidgetBase, BaseStage, Controls))
+        )
+        redirected = isinstance(sys.stdout, LogStream) or isinstance(sys.stderr, LogStream)
+        leaked = handlers or redirected or any(counts.get(name, 0) > n for name, n in expected.items())
+        live = ", ".join(f"{name} {counts.get(name, 0)}/{n}" for name, n in expected.items())
+        print(f"{'⚠' if leaked else '🧹'} Leak check after {self.name}: {live} (live/cached), "
+              f"{handlers} handlers bound, stdout {'still redirected' if redirected else 'restored'}")
+        return not leaked
 
 
 class GameWidgetBase(Widget):
@@ -87,6 +139,36 @@ class GameWidgetBase(Widget):
     LOG_X = 10
     LOG_Y_START = 10
     LOG_LINE_HEIGHT = 20
+    # Minimum level shown and echoed; optional file the log is appended to
+    LOG_LEVEL = parse_level(os.environ.get("KITTYKABOOM_LOG_LEVEL", "INFO"))
+    LOG_FILE = os.environ.get("KITTYKABOOM_LOG_FILE")
+    LOG_COLORS = {WARNING: (1, 0.8, 0.3, 1), ERROR: (1, 0.4, 0.4, 1)}
+    # Most physics ticks run per rendered frame; lower it on slow phones to
+    # trade simulation accuracy (the game slows down) for CPU time
+    MAX_SUBSTEPS = 5
+    # Idle Ball widgets kept for reuse; raise it for rapid-fire weapons
+    BALL_POOL_SIZE = 32
+    # Frame profiler overlay; also toggled with F3 (F4 exports the trace)
+    PROFILE = bool(os.environ.get("KITTYKABOOM_PROFILE"))
+    PROFILE_REFRESH_FRAMES = 30
+    # Record every match to a replay file when leaving the stage
+    RECORD = bool(os.environ.get("KITTYKABOOM_RECORD"))
+    # Dotted flight path of the next shot while aiming
+    SHOW_TRAJECTORY = True
+    TRAJECTORY_COLOR = (1, 1, 1, 0.5)
+    # CPU-controlled player (1 or 2; 0 = two humans) and its thinking time in seconds
+    AI_PLAYER = int(os.environ.get("KITTYKABOOM_AI", "0") or 0)
+    AI_DEADLINE = 1.0
+    # Worker processes for the AI's shot search; 0 searches on a background thread
+    AI_PROCESSES = int(os.environ.get("KITTYKABOOM_AI_PROCESSES", "0") or 0)
+    # Accelerometer samples per second, weight of each new sample (1 = no
+    # smoothing) and the tilt in m/s^2 below which the tank holds still
+    ACCEL_RATE = float(os.environ.get("KITTYKABOOM_ACCEL_HZ", "30") or 30)
+    ACCEL_SMOOTHING = 0.5
+    ACCEL_DEAD_ZONE = 0.5
+    # Frames per second while nothing moves (see _pace_loop); 0 only wakes
+    # for the turn timer's whole seconds
+    IDLE_RATE = 4
 
     def __init__(self, p1_color='red', p2_color='blue',  **kwargs):
         super().__init__(**kwargs)
@@ -106,34 +188,34 @@ class GameWidgetBase(Widget):
 
         for tank in self.full_tanks:
             self.add_widget(tank)
-            
-        self.tank_vy = [0 for _ in self.full_tanks]
-        self.tank_target_y = [10, 10]
+
+        # --- Simulation (headless; widgets mirror it once per frame) ---
+        self.world = World(
+            (TankState(tank.color_name, tank.x, tank.y, tank.width, tank.height)
+             for tank in self.full_tanks),
+            seed=random.randrange(1 << 32),
+        )
+        self.timestep = FixedTimestep(max_steps=self.MAX_SUBSTEPS)
+        self.base_height = 720
+        self.scale_y = self.height / self.base_height
 
         # Adjust tank position/size when window resizes
         self.bind(size=self._initialize_tank_positions)
 
-        self.current_turn = 0
-        self.active_tank = self.full_tanks[self.current_turn]
-
-        # --- Physics settings ---
-        self.base_height = 720
-        
-        self.scale_y = self.height / self.base_height
-        self.vx, self.vy = 0, 0
-        self.gravity = -9.8 * 0.05
-        self.friction = 0.98
-        self.bounce = 0.7
         self.walls = []
-        self.launch_speed = 20.0
         self.balls = []
-        self.turn_timer = 10.0
-        self.turn_state = "START_DROP"
-        self.cannon_angle_speed = 1.0
+
+        # --- Aim preview (redrawn only when the predicted path changes) ---
+        self.trajectory = TrajectoryPredictor() if self.SHOW_TRAJECTORY else None
+        self._trajectory_points = None
+        with self.canvas.after:
+            Color(*self.TRAJECTORY_COLOR)
+            self.trajectory_line = Line(points=[], dash_length=6, dash_offset=6)
+        self.ball_pool = ObjectPool(Ball, capacity=self.BALL_POOL_SIZE, reset=Ball.reset)
 
         # --- Turn label ---
         self.turn_label = Label(
-            text=f"Tank {self.current_turn + 1} Turn: {int(self.turn_timer)}s",
+            text=f"Tank {self.world.current_turn + 1} Turn: {int(self.world.turn_timer)}s",
             size_hint=(None, None),
             size=(300, 40),
             pos=(10, self.height - 60)
@@ -142,7 +224,9 @@ class GameWidgetBase(Widget):
         self.add_widget(self.turn_label)
 
         # --- Logging system ---
-        self.logs = deque(maxlen=self.LOG_MAX_LINES)
+        # Messages land in a ring buffer; labels catch up once per frame
+        self.log = GameLog(self.LOG_MAX_LINES, self.LOG_LEVEL, path=self.LOG_FILE)
+        self._log_version = 0
         self.log_labels = []
         for i in range(self.LOG_MAX_LINES):
             lbl = Label(
@@ -158,311 +242,493 @@ class GameWidgetBase(Widget):
             self.add_widget(lbl)
             self.log_labels.append(lbl)
 
-        # Redirect print to in-game log
-        sys.stdout = self
-        sys.stderr = self
+        self._log_streams = []
+        self.open_log()
+
+        # --- CPU opponent (optional) ---
+        self.ai = None
+        if self.AI_PLAYER:
+            self.ai = AIController(self.AI_PLAYER - 1, self.AI_DEADLINE, self.AI_PROCESSES, log=self.log)
+
+        # --- Game over overlay (cleared by reset) ---
+        self._game_over_marks = []
+        self.game_over_label = None
+
+        # --- Replays: at most one of recorder/player is set ---
+        self.recorder = None
+        self.player = None
+        self.replay_speed = 1
+        self.render_every = 1
+        self.replay_ok = None
+        self._frame = 0
+        # Set by the stage: re-rasterizes stretched walls now (playback calls
+        # it at the recorded tick instead of after a wall-clock delay)
+        self.rebuild_terrain = None
+
+        # --- Loop (start_loop/stop_loop) ---
+        self._loop_event = None
+        self._loop_stopped = False
+        self.idle = False
+        # Tick cap for the frame after an idle one, and the Clock time of the last frame
+        self._catch_up_steps = None
+        self._frame_time = 0.0
+
+        # --- Profiling (opt-in) ---
+        self.profiler = None
+        self.profile_label = None
+        if self.PROFILE:
+            self.enable_profiler()
 
         # --- Platform detection ---
         self.platform = core_platform
-        self._keys = set()
-        if self.platform != "android":
-            Window.bind(on_key_down=self._on_key_down, on_key_up=self._on_key_up)
+        self.controls = Controls(
+            self.platform, self.ACCEL_RATE, self.ACCEL_SMOOTHING, self.ACCEL_DEAD_ZONE,
+            on_press=self._on_key_press, on_change=self.wake, log=self.log,
+        )
+        self.bind_input()
+        leaks.track(self)
 
     
+    @property
+    def active_tank(self):
+        return self.full_tanks[self.world.current_turn]
+
+    # --- Restart ---
+    def reset(self, seed=None):
+        """Start a fresh match on this stage without rebuilding any widgets.
+
+        Walls get their pristine terrain back, balls return to the pool and a
+        new ``World`` starts over from the opening drop.
+        """
+        for ball in self.balls:
+            self.remove_widget(ball)
+            self.ball_pool.release(ball)
+        self.balls = []
+        for tank, *marks in self._game_over_marks:
+            for instruction in marks:
+                tank.canvas.after.remove(instruction)
+        self._game_over_marks = []
+        if self.game_over_label:
+            self.remove_widget(self.game_over_label)
+            self.game_over_label = None
+        for wall in self.walls:
+            wall.reset()
+
+        terrain = self.world.terrain
+        self.world = World(
+            (TankState(tank.color_name) for tank in self.full_tanks),
+            seed=random.randrange(1 << 32) if seed is None else seed,
+        )
+        self.world.terrain = terrain
+        self.world.profiler = self.profiler
+        self.timestep = FixedTimestep(max_steps=self.MAX_SUBSTEPS)
+        self.recorder = self.player = None
+        self.replay_speed = self.render_every = 1
+        self.replay_ok = None
+        self._frame = 0
+        self._trajectory_points = None
+
+        self.log.clear()
+        self.open_log()
+        self._update_bg()
+        self._initialize_tank_positions(self, self.size)
+
+    def cache_cost(self):
+        """Approximate bytes kept alive while this stage sits in ``stage_cache``."""
+        return sum(wall.cache_cost() for wall in self.walls)
+
     # --- Tank Setup ---
     def _initialize_tank_positions(self, instance, value): 
         """Adjust tank sizes when screen resizes. 
         - At game start, tanks start above the screen.
         - On resize, keep relative positions. """ 
-        tank_h = self.height * 0.10 
-        tank_w = tank_h * 1.5 # 1.5:1 aspect ratio 
-        for i, tank in enumerate(self.full_tanks): 
-            # Update size 
-            tank.size = (tank_w, tank_h) 
-            
-            # Update X based on percentage of screen width 
-            tank.x = self.width * (0.15 if i == 0 else 0.85) - tank_w / 2 
-            # Y-position: 
-            if not hasattr(tank, "initialized"):
-                # First time: start above the screen 
-                tank.y = self.height + tank_h 
-                tank.initialized = True 
-            else: 
-                # Resize: keep same relative Y (e.g., distance from bottom) 
-                tank.y = tank.y / self.old_height * self.height if hasattr(self, "old_height") else tank.y 
-                tank.y *= 1.002 
-        # Save current height for next resize 
-        self.old_height = self.height 
-        # Facing directions 
-        self.full_tanks[0].flip_horizontal(False) 
-        self.full_tanks[1].flip_horizontal(True) 
-        
-        self._reposition_ui()
-
-    def _switch_turn(self, dt):
-        """Switch control to the next tank."""
-        self.current_turn = (self.current_turn + 1) % len(self.full_tanks)
-        self.active_tank = self.full_tanks[self.current_turn]
+        self.world.layout_tanks(self.width, self.height)
 
-        is_facing_left = self.current_turn == 1
-        self.active_tank.flip_horizontal(is_facing_left)
-
-        self.vx = self.vy = 0
-        self.turn_timer = 10.0
-        self.turn_state = "INPUT"
-
-        print(f"🔄 Turn switched! Now controlling Tank {self.current_turn + 1}")
+        for tank, state in zip(self.full_tanks, self.world.tanks):
+            tank.size = (state.width, state.height)
+        self._sync_widgets()
+        self._reposition_ui()
+        self.wake()
 
     def _reposition_ui(self, *args):
         """Reposition UI elements when window resizes."""
         self.turn_label.pos = (10, self.height - self.turn_label.height - 10)
+        if self.profile_label:
+            self.profile_label.pos = (self.width - self.profile_label.width - 10,
+                                      self.height - self.profile_label.height - 10)
 
     # --- Ball Launch ---
     def launch_ball(self):
-        tank = self.active_tank
-        angle_rad = math.radians(tank.cannon_angle)
-
-        vx = self.launch_speed * math.cos(angle_rad)
-        vy = self.launch_speed * math.sin(angle_rad)
-
-        if tank.facing_left:
-            vx *= -1
-
-        # --- Spawn Ball just outside the Cannon
-        offset_distance = tank.width * 0.6 * self.scale_y  # distance from tank center
-        spawn_x = tank.center_x + math.cos(angle_rad) * offset_distance * (-1 if tank.facing_left else 1)
-        spawn_y = tank.center_y + math.sin(angle_rad) * offset_distance
-
-        new_ball = Ball(pos=(spawn_x, spawn_y))
-        new_ball.velocity = Vector(vx, vy)
-        new_ball.gravity_scale = self.gravity * self.scale_y
-        new_ball.fired = True
-        new_ball.owner = tank  # so it doesn’t kill its own tank
-
+        """Fire the active tank's cannon."""
+        self._spawn_ball(self.world.launch_ball())
+
+    def _spawn_ball(self, state):
+        """Show a ball from the simulation, reusing a pooled widget when one is free."""
+        tank = self.world.tanks[state.owner]
+        self.log.info(f"💥 FIRE! Angle: {tank.cannon_angle}° | Vx: {state.launch_vx:.1f}, Vy: {state.launch_vy:.1f}")
+        if state.batch is None:
+            # Fired into the ground: it settled in the same tick it launched
+            return
+        new_ball = self.ball_pool.acquire()
+        new_ball.state = state
+        new_ball.owner = self.full_tanks[state.owner]  # so it doesn’t kill its own tank
         self.balls.append(new_ball)
         self.add_widget(new_ball)
 
-        print(f"💥 FIRE! Angle: {tank.cannon_angle}° | Vx: {vx:.1f}, Vy: {vy:.1f}")
-
-
     # --- Background update ---
     def _update_bg(self, *args):
         self.bg_rect.pos = (0, 0)
         self.bg_rect.size = (self.width, self.height)
         
         self.scale_y = self.height / self.base_height
-        self.gravity = -9.8 * 0.05 * self.scale_y
-        self.launch_speed = 20.0 * self.scale_y
+        self.world.resize(self.width, self.height, self.scale_y)
+        if self.recorder:
+            self.recorder.resize(self.width, self.height)
 
     # --- Logging ---
-    def write(self, message):
-        """Redirect print output to in-game log display."""
-        message = message.strip()
-        if not message:
+    def _refresh_log(self):
+        """Copy new log lines into the labels; a no-op unless something was logged."""
+        if self.log.version == self._log_version:
             return
-
-        self.logs.append(message)
-
+        self._log_version = self.log.version
+        entries = self.log.lines()
+        offset = self.LOG_MAX_LINES - len(entries)
         for i, lbl in enumerate(self.log_labels):
-            idx = i - (self.LOG_MAX_LINES - len(self.logs))
-            lbl.text = self.logs[idx] if idx >= 0 else ""
-
-        sys.__stdout__.write(message + "\n")
-
-    def flush(self):
-        pass
+            level, text = entries[i - offset] if i >= offset else (0, "")
+            if lbl.text != text:
+                lbl.text = text
+                lbl.color = self.LOG_COLORS.get(level, (1, 1, 1, 1))
+
+    def open_log(self):
+        """Redirect print to the in-game log (undone by close_log)."""
+        if not self._log_streams:
+            self._log_streams = [
+                LogStream(self.log).install("stdout"),
+                LogStream(self.log, ERROR).install("stderr"),
+            ]
+
+    def close_log(self):
+        """Give back sys.stdout/sys.stderr and stop the log writer."""
+        for stream in self._log_streams:
+            stream.restore()
+        self._log_streams = []
+        self.log.close()
 
     def game_over(self, tank, ball):
         """Handle game over when a tank is hit by a ball."""
-        print(f"💀 Game Over! {tank.color_name} tank was hit!")
+        self.log.info(f"💀 Game Over! {tank.color_name} tank was hit!")
 
         # Stop the game loop
-        Clock.unschedule(self.update_game_state)
+        self.stop_loop()
+        self._refresh_log()
 
         # Visual indicator (optional)
         with tank.canvas.after:
-            Color(1, 0, 0, 0.5)
+            color = Color(1, 0, 0, 0.5)
             tank.width = tank.width * 0.6
             tank.height = tank.height * 0.6
-            Rectangle(pos=tank.pos, size=tank.size)
+            rect = Rectangle(pos=tank.pos, size=tank.size)
+        self._game_over_marks.append((tank, color, rect))
 
         # Optionally show a label
-        self.add_widget(Label(
+        self.game_over_label = Label(
             text="GAME OVER",
             font_size=48,
             color=(1, 0, 0, 1),
             size_hint=(None, None),
             size=(400, 100),
             pos=(self.width/2 - 200, self.height/2 - 50)
-        ))
+        )
+        self.add_widget(self.game_over_label)
+
 
+    # --- Profiling ---
+    def enable_profiler(self, enabled=True):
+        """Start or stop recording frame timings and showing the overlay."""
+        if enabled and not self.profiler:
+            self.profiler = FrameProfiler()
+            self.profile_label = Label(
+                text="",
+                size_hint=(None, None),
+                size=(260, 200),
+                font_size=12,
+                halign="left",
+                valign="top",
+                text_size=(260, 200),
+                pos=(self.width - 270, self.height - 210),
+            )
+            self.add_widget(self.profile_label)
+        elif not enabled and self.profiler:
+            self.remove_widget(self.profile_label)
+            self.profiler = self.profile_label = None
+        self.world.profiler = self.profiler
+
+    def export_profile(self, name="stage"):
+        """Write the recorded trace as JSON and CSV; return the JSON path."""
+        app = App.get_running_app()
+        folder = app.user_data_dir if app else os.getcwd()
+        base = os.path.join(folder, f"frame_trace_{name}_{time.strftime('%Y%m%d_%H%M%S')}")
+        self.profiler.export_json(base + ".json", stage=name, platform=self.platform, size=list(self.size))
+        self.profiler.export_csv(base + ".csv")
+        self.log.info(f"📈 Frame trace saved: {base}.json")
+        return base + ".json"
+
+    # --- Replays ---
+    def start_recording(self, stage):
+        """Record this match's input from the next tick on."""
+        colors = [tank.color_name for tank in self.full_tanks]
+        self.recorder = ReplayRecorder(stage, self.world, colors)
+
+    def save_recording(self):
+        """Write the recorded match to the app's data folder; return the path."""
+        replay = self.recorder.finish(self.world)
+        self.recorder = None
+        app = App.get_running_app()
+        folder = app.user_data_dir if app else os.getcwd()
+        path = os.path.join(folder, f"replay_{replay.stage}_{time.strftime('%Y%m%d_%H%M%S')}.kkr")
+        replay.save(path)
+        self.log.info(f"🎬 Replay saved: {path} ({replay.ticks} ticks)")
+        return path
+
+    def play_replay(self, replay, speed=1, render_every=1):
+        """Re-simulate ``replay`` instead of reading input.
+
+        ``speed`` ticks run per real tick (fast-forward) and the widgets are
+        only redrawn every ``render_every`` frames. The stage must be the
+        recorded one, entered at the recorded size.
+        """
+        if isinstance(replay, (bytes, bytearray)):
+            replay = Replay.from_bytes(replay)
+        self.world.seed = replay.seed
+        self.world.rng.seed(replay.seed)
+        self.world.configure(**replay.config)
+        self.recorder = None
+        self.player = ReplayPlayer(
+            replay, on_resize=lambda w, h: setattr(self, "size", (w, h)),
+            on_rebuild=lambda: self.rebuild_terrain and self.rebuild_terrain(),
+        )
+        self.replay_speed = speed
+        self.render_every = max(1, render_every)
+        self.timestep.max_steps = max(self.MAX_SUBSTEPS, speed)
+
+    def _finish_replay(self):
+        """Stop playback and report whether the match was reproduced."""
+        player, self.player = self.player, None
+        self.stop_loop()
+        self._sync_widgets(1.0)
+        self.replay_ok = player.verify(self.world)
+        if self.replay_ok:
+            self.log.info(f"🎬 Replay finished: {player.replay.ticks} ticks reproduced")
+        else:
+            self.log.warning(f"⚠ Replay diverged: {player.mismatches or 'final state differs'}")
+        self._refresh_log()
+        return self.replay_ok
+
+    def _count_instructions(self):
+        """Number of canvas instructions in this widget's tree."""
+        total = 0
+        stack = [self]
+        while stack:
+            widget = stack.pop()
+            canvas = widget.canvas
+            total += len(canvas.children)
+            if canvas.has_before:
+                total += len(canvas.before.children)
+            if canvas.has_after:
+                total += len(canvas.after.children)
+            stack.extend(widget.children)
+        return total
 
     # --- Game Loop ---
+    def start_loop(self):
+        """Run update_game_state every rendered frame until stop_loop or game over."""
+        self.stop_loop()
+        self._loop_stopped = False
+        self._loop_event = Clock.schedule_interval(self.update_game_state, 0)
+
+    def stop_loop(self):
+        """Stop the loop; a frame already under way returns without ticking."""
+        self._loop_stopped = True
+        self.idle = False
+        self._catch_up_steps = None
+        if self._loop_event:
+            self._loop_event.cancel()
+            self._loop_event = None
+
+    def wake(self, *args):
+        """Leave idle mode and go back to a tick every frame, starting with the next one.
+
+        The time since the last idle frame is owed to the next frame, which
+        the new interval wouldn't count, so the turn timer doesn't drift.
+        (Called from within a frame, that is nothing.)
+        """
+        if self.idle and self._loop_event:
+            self.idle = False
+            self._loop_event.cancel()
+            self.timestep.accumulator += max(0.0, Clock.get_time() - self._frame_time)
+            self._loop_event = Clock.schedule_interval(self.update_game_state, 0)
+
+    def _is_quiescent(self):
+        world = self.world
+        if self.player or (self.ai and self.ai.player == world.current_turn):
+            return False
+        return world.quiescent() and self.controls.state == (0, 0)
+
+    def _pace_loop(self):
+        """Drop to IDLE_RATE frames while the world is at rest, and back once it isn't.
+
+        Idle frames still run every tick owed, so the simulation (and any
+        recording) is the same as at full rate; only drawing is less frequent.
+        Catch-up is capped at the ticks the wait stands for, so a frame that
+        arrives very late (app suspended) doesn't play out turns unattended.
+        The next idle frame never lands later than the turn timer's next
+        whole second, so the countdown and the shot it triggers stay on time.
+        """
+        if self._loop_event is None:
+            return
+        world = self.world
+        # No height yet (first layout pass): nothing to pace the timer by
+        if not world.scale_y or not self._is_quiescent():
+            self.wake()
+            return
+        delay = (world.turn_timer % 1.0) / world.scale_y
+        if self.IDLE_RATE:
+            delay = min(delay, 1.0 / self.IDLE_RATE)
+        tick = self.timestep.tick
+        self._loop_event.cancel()
+        self._loop_event = Clock.schedule_once(self.update_game_state, delay + tick)
+        self.idle = True
+        # The next frame (or the first after a wake) runs the ticks this wait
+        # stands for, plus one for a late frame; anything beyond is dropped
+        self._catch_up_steps = math.ceil((delay + tick) / tick) + 1
+
     def update_game_state(self, dt):
-        ax = ay = 0
-        tank = self.active_tank
-        
-        if self.turn_state == "START_DROP":
-            all_settled = True
-            for i, tank in enumerate(self.full_tanks):
-                self.tank_vy[i] += self.gravity
-                new_y = tank.y + self.tank_vy[i]
-
-                # Check collisions with floor or walls
-                collision_y = 1  # floor
-                for wall in self.walls:
-                    wx, wy, ww, wh = wall.pos[0], wall.pos[1], wall.size[0], wall.size[1]
-                    if (tank.x + tank.width > wx and tank.x < wx + ww) and (new_y <= wy + wh <= tank.y):
-                        collision_y = max(collision_y, wy + wh)
-
-                if new_y <= collision_y:
-                    new_y = collision_y
-                    self.tank_vy[i] = 0
-                else:
-                    all_settled = False
-
-                tank.y = new_y
-
-            if all_settled:
-                self.turn_state = "INPUT"
-                self.vx = self.vy = 0
-                self.turn_timer = 10.0
-                self.active_tank = self.full_tanks[self.current_turn]
-
-        # --- Turn timer ---
-        if self.turn_state == "INPUT":
-            self.turn_timer -= dt * (self.scale_y)
-            self.turn_label.text = f"Tank {self.current_turn + 1} Turn: {int(self.turn_timer)}s"
-
-            if self.turn_timer <= 0:
-                self.launch_ball()
-                self.turn_state = "FIRING"
-                self.vx = self.vy = 0
-
-        # --- Input handling ---
-        if self.turn_state == "INPUT":
-            if self.platform == "android":
-                try:
-                    accel = accelerometer.acceleration
-                    if accel and all(a is not None for a in accel):
-                        x, y, z = accel
-                        ax = y * 0.3
-                        if x > 1.5:
-                            tank.rotate_cannon(+self.cannon_angle_speed)
-                        elif x < -1.5:
-                            tank.rotate_cannon(-self.cannon_angle_speed)
-                except Exception:
-                    pass
+        """Run the fixed-rate ticks owed for this frame, then draw once."""
+        if self._loop_stopped:
+            # Stopped while this frame was already queued
+            return False
+        self._frame_time = Clock.get_time()
+        prof = self.profiler
+        player = self.player
+        if prof:
+            prof.begin_frame()
+            start = prof.clock()
+        if not player:
+            self._read_input()
+        if prof: prof.add("input", start)
+
+        # Idle frames are far apart; run the ticks they stand for (see _pace_loop)
+        max_steps, self._catch_up_steps = self._catch_up_steps, None
+        for _ in range(self.timestep.advance(dt * self.replay_speed, max_steps)):
+            if prof: prof.count("ticks")
+            if player:
+                if player.done:
+                    break
+                player.tick(self.world)
             else:
-                # Keyboard controls
-                if "left" in self._keys:  ax -= 1.0
-                if "right" in self._keys: ax += 1.0
-                if "up" in self._keys:    tank.rotate_cannon(+self.cannon_angle_speed)
-                if "down" in self._keys:  tank.rotate_cannon(-self.cannon_angle_speed)
-
-            # --- Physics ---
-            ay += self.gravity
-            self.vx += ax
-            self.vy += ay
-            self.vx *= self.friction
-            self.vy *= self.friction
-
-            new_x = tank.x + self.vx
-            new_y = tank.y + self.vy
-            tank_w, tank_h = tank.size
-
-            # Screen boundaries
-            if new_x < 0: new_x, self.vx = 0, -self.vx * self.bounce
-            elif new_x + tank_w > self.width: new_x, self.vx = self.width - tank_w, -self.vx * self.bounce
-            if new_y < 0: new_y, self.vy = 0, -self.vy * self.bounce
-            elif new_y + tank_h > self.height: new_y, self.vy = self.height - tank_h, -self.vy * self.bounce
-
-            # Wall collisions
-            """for wall in self.walls:
-                wx, wy, ww, wh = wall.x, wall.y, wall.width, wall.height
-                if (new_x < wx + ww and new_x + tank_w > wx and
-                    new_y < wy + wh and new_y + tank_h > wy):
-
-                    prev_x, prev_y = tank.x, tank.y
-
-                    if prev_x + tank_w <= wx:
-                        new_x = wx - tank_w
-                        self.vx = -self.vx * self.bounce
-                    elif prev_x >= wx + ww:
-                        new_x = wx + ww
-                        self.vx = -self.vx * self.bounce
-
-                    if prev_y + tank_h <= wy:
-                        new_y = wy + wh
-                        self.vy = -self.vy * self.bounce
-                    elif prev_y >= wy + wh:
-                        new_y = wy + wh
-                        self.vy = -self.vy * self.bounce"""
-                        
-            # --- Tank vs Wall Collision ---
-            for wall in self.walls:
-                # Check if wall has destructible blocks
-                if hasattr(wall, "blocks"):
-                    for block in wall.blocks[:]:
-                        if tank.collide_widget(block):                            
-                            # Basic bounce or stop effect
-                            # Determine horizontal or vertical collision
-                            if abs((tank.center_x - block.center_x)) > abs((tank.center_y - block.center_y)):
-                                # Horizontal collision
-                                self.vx *= -self.bounce
-                                if tank.center_x < block.center_x:
-                                    new_x = block.x - tank.width
-                                else:
-                                    new_x = block.right
-                            else:
-                                # Vertical collision
-                                self.vy *= -self.bounce
-                                if tank.center_y < block.center_y:
-                                    new_y = block.y - tank.height
-                                else:
-                                    new_y = block.top
-
-
-            # Auto-flip tank based on velocity
-            if self.vx > 0.1 and tank.facing_left:
-                tank.flip_horizontal(False)
-            elif self.vx < -0.1 and not tank.facing_left:
-                tank.flip_horizontal(True)
-
-            tank.pos = (new_x, new_y)
-
-        # --- Ball updates ---
-        balls_to_remove = []
+                if self.ai:
+                    self.ai.tick(self.world)
+                if self.recorder:
+                    self.recorder.tick(self.world)
+            self._handle_events(self.world.step(self.timestep.tick))
+            if self.world.turn_state == "GAME_OVER":
+                break
+
+        if player and (player.done or self.world.turn_state == "GAME_OVER"):
+            self._finish_replay()
+            return False
+        self._pace_loop()
+
+        self._frame += 1
+        if self._frame % self.render_every and not prof:
+            return
+        if prof: start = prof.clock()
+        self._sync_widgets(self.timestep.alpha)
+        if prof:
+            prof.add("draw", start)
+            prof.count("instructions", self._count_instructions())
+            prof.end_frame()
+            if len(prof.frames) % self.PROFILE_REFRESH_FRAMES == 0:
+                self.profile_label.text = prof.format_overlay()
+
+    def _read_input(self):
+        """Hand the latest controls snapshot to the world."""
+        if self.world.turn_state == "INPUT":
+            self.world.set_input(*self.controls.state)
+        else:
+            self.world.set_input(0, 0)
+
+    def _handle_events(self, events):
+        """React to what happened during a simulation step."""
+        for event in events:
+            kind = event[0]
+            if kind == "fire":
+                self._spawn_ball(event[1])
+            elif kind == "settle":
+                for ball in self.balls:
+                    if ball.state is event[1]:
+                        self.balls.remove(ball)
+                        self.remove_widget(ball)
+                        self.ball_pool.release(ball)
+                        break
+            elif kind == "turn":
+                if self.recorder:
+                    self.recorder.turn(event[1])
+                elif self.player:
+                    self.player.turn(event[1])
+                self.log.info(f"🔄 Turn switched! Now controlling Tank {event[1] + 1}")
+            elif kind == "hit":
+                ball = next((b for b in self.balls if b.state is event[2]), None)
+                self.game_over(self.full_tanks[event[1]], ball)
+
+    def _sync_widgets(self, alpha=1.0):
+        """Mirror the simulation onto the widgets (once per rendered frame).
+
+        Positions are interpolated ``alpha`` of the way from the previous tick
+        to the current one, so motion stays smooth between fixed ticks.
+        """
+        for tank, state in zip(self.full_tanks, self.world.tanks):
+            pos = state.lerp_pos(alpha)
+            if tank.pos != list(pos):
+                tank.pos = pos
+            tank.flip_horizontal(state.facing_left)
+            tank.set_cannon_angle(state.cannon_angle)
+
         for ball in self.balls:
-            # 1️⃣ Ball movement
-            ball.update(dt, self.walls, self.bounce)
-
-            # 2️⃣ Check tank collisions
-            for tank in self.full_tanks:
-                if tank.collide_widget(ball):
-                    self.game_over(tank, ball)
-                    return  # stop game immediately
-
-            # 3️⃣ Destroy wall blocks
-            for wall in self.walls:
-                wall.destroy_at(ball.center, radius=ball.width/2)
-
-            # 4️⃣ Ball settled
-            if not ball.fired:
-                balls_to_remove.append(ball)
-
-        if balls_to_remove and self.turn_state == "FIRING":
-            for ball in balls_to_remove:
-                self.balls.remove(ball)
-                self.remove_widget(ball)
-
-            if not self.balls:
-                self._switch_turn(dt)
-
-    # --- Keyboard handlers ---
-    def _on_key_down(self, window, key, scancode, codepoint, modifiers):
-        self._keys.add(Window._system_keyboard.keycode_to_string(key))
-
-    def _on_key_up(self, window, key, *args):
-        self._keys.discard(Window._system_keyboard.keycode_to_string(key))
-        
\ No newline at end of file
+            ball.sync(alpha)
+
+        for wall in self.walls:
+            wall.sync()
+
+        if self.world.turn_state == "INPUT":
+            self.turn_label.text = f"Tank {self.world.current_turn + 1} Turn: {int(self.world.turn_timer)}s"
+
+        self._sync_trajectory()
+        self._refresh_log()
+
+    def _sync_trajectory(self):
+        points = None
+        if self.trajectory and self.world.turn_state == "INPUT":
+            points = self.trajectory.predict(self.world)
+        if points is not self._trajectory_points:
+            self._trajectory_points = points
+            self.trajectory_line.points = points or []
+
+    # --- Input ---
+    def bind_input(self):
+        """Start listening to the keyboard or accelerometer; undone by unbind_input."""
+        self.controls.start()
+
+    def unbind_input(self):
+        self.controls.stop()
+
+    def _on_key_press(self, name):
+        self.wake()
+        if name == "f3":
+            self.enable_profiler(not self.profiler)
+        elif name == "f4" and self.profiler:
+            self.export_profile()
+
+
+# Stages left recently, by (stage name, p1 color, p2 color)
+stage_cache = LRUCache(BaseStage.CACHE_SIZE, BaseStage.CACHE_BYTES, cost=GameWidgetBase.cache_cost)
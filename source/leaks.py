@@ -0,0 +1,68 @@
+"""Debug leak tracking for long play sessions.
+
+With ``KITTYKABOOM_LEAK_CHECK=1`` every ``GameWidgetBase``, ``Ball`` and
+``Wall`` registers itself here, and each stage exit logs how many are still
+alive next to how many the stage cache legitimately holds, plus any
+handlers still bound to a stage or game. Numbers that keep growing from one
+exit to the next point at something that is never torn down. Tracking is
+off by default and then costs one ``None`` check per constructed object.
+"""
+import gc
+import os
+import weakref
+
+
+class LeakTracker:
+    """Weakly counts live instances per class name."""
+
+    def __init__(self):
+        self._live = {}
+
+    def track(self, obj):
+        self._live.setdefault(type(obj).__name__, weakref.WeakSet()).add(obj)
+
+    def counts(self):
+        """Live instances per class name, after a full collection."""
+        gc.collect()
+        return {name: len(objs) for name, objs in self._live.items()}
+
+
+def bound_callbacks(dispatcher, names, owners):
+    """Count live handlers on ``dispatcher``'s events/properties ``names`` bound to ``owners`` instances."""
+    count = 0
+    for name in names:
+        for observer in dispatcher.get_property_observers(name):
+            if getattr(observer, "is_dead", None) and observer.is_dead():
+                continue
+            target = getattr(observer, "proxy", None) or getattr(observer, "__self__", None)
+            try:
+                if target is not None and isinstance(target, owners):
+                    count += 1
+            except ReferenceError:
+                pass
+    return count
+
+
+def scheduled_callbacks(clock, owners):
+    """Count Clock events whose callback is a game method of an ``owners`` instance.
+
+    Kivy's own deferred work on those widgets (``do_layout`` and friends) is
+    not counted; it runs once and lets go.
+    """
+    count = 0
+    for event in clock.get_events():
+        callback = event.get_callback()
+        if not isinstance(getattr(callback, "__self__", None), owners):
+            continue
+        if not (getattr(callback, "__module__", None) or "").startswith("kivy."):
+            count += 1
+    return count
+
+
+# Only set when leak checking is on
+tracker = LeakTracker() if os.environ.get("KITTYKABOOM_LEAK_CHECK") else None
+
+
+def track(obj):
+    if tracker is not None:
+        tracker.track(obj)
@@ -1,36 +1,74 @@
+import importlib
+import threading
+
 from kivy.app import App
 from kivy.uix.screenmanager import ScreenManager, FadeTransition
 from kivy.core.window import Window
 from kivy.properties import StringProperty
+from kivy.clock import Clock
 
 
-# Import your scenes
-from scene.title import TitleScreen
-from scene.welcome import WelcomeScreen
-from scene.stage1_1 import Stage1_1
-from scene.stage1_2 import Stage1_2   # you’ll need to create this like stage1_1
+# Scenes: (module, class) per screen name; each is imported and built the
+# first time it is shown, so startup only pays for the welcome screen
+SCREENS = {
+    "welcome": ("scene.welcome", "WelcomeScreen"),
+    "title": ("scene.title", "TitleScreen"),
+    "stage1_1": ("scene.stage1_1", "Stage1_1"),
+    "stage1_2": ("scene.stage1_2", "Stage1_2"),
+    "tank_select": ("scene.tank_select", "TankSelectScreen"),
+}
+
+# Screen most likely to follow each one; prepared in the background
+PREWARM = {
+    "welcome": "tank_select",
+    "tank_select": "stage1_1",
+    "title": "stage1_1",
+}
 
-from kivy.app import App
-from scene.tank_select import TankSelectScreen 
 
 class GameScreenManager(ScreenManager):
     
     p1_tank_color = StringProperty('red')  # Default for safety
     p2_tank_color = StringProperty('blue') # Default for safety
+
+    # Set to False to build screens only when they are navigated to
+    prewarm = True
     
     def __init__(self, **kwargs):
         super().__init__(transition=FadeTransition(), **kwargs)
 
-        # Add screens
-        self.add_widget(WelcomeScreen(name="welcome"))
-        self.add_widget(TitleScreen(name="title"))
-        self.add_widget(Stage1_1(name="stage1_1"))
-        self.add_widget(Stage1_2(name="stage1_2"))
-        self.add_widget(TankSelectScreen(name="tank_select")) 
-
-        # Start at title screen
+        # Start at welcome screen
         self.current = "welcome"
 
+    def on_current(self, instance, value):
+        if value is not None:
+            self.ensure_screen(value)
+        super().on_current(instance, value)
+        if self.prewarm and value in PREWARM:
+            self.prewarm_screen(PREWARM[value])
+
+    def ensure_screen(self, name):
+        """Import and build screen ``name`` unless it already exists."""
+        if self.has_screen(name):
+            return self.get_screen(name)
+        module_name, class_name = SCREENS[name]
+        screen_class = getattr(importlib.import_module(module_name), class_name)
+        screen = screen_class(name=name)
+        self.add_widget(screen)
+        return screen
+
+    def prewarm_screen(self, name):
+        """Import ``name``'s module on a worker thread, then build it on a later frame."""
+        if self.has_screen(name):
+            return
+
+        def load():
+            importlib.import_module(SCREENS[name][0])
+            # Widgets must be created on the main thread
+            Clock.schedule_once(lambda dt: self.ensure_screen(name))
+
+        threading.Thread(target=load, name=f"prewarm-{name}", daemon=True).start()
+
 class BallRollerApp(App):
     def build(self):
         return GameScreenManager()
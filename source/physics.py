@@ -0,0 +1,813 @@
+"""Headless game simulation.
+
+Holds tank, ball and terrain state in plain ``__slots__`` objects and steps
+it without touching Kivy, so the game logic can run without a window.
+``GameWidgetBase`` feeds input in, calls ``World.step`` and mirrors the
+result onto its widgets once per rendered frame.
+"""
+import math
+import random
+from array import array
+
+import numpy as np
+
+from terrain import TerrainIndex
+
+TICK = 1.0 / 60.0  # physics is tuned per 60 Hz tick
+
+BALL_SIZE = 20
+CANNON_LIMIT = 80
+# Tanks hitting terrain slower than this (px/tick) stop instead of bouncing
+TANK_REST_SPEED = 1.0
+# Tanks slower than this (px/tick) count as standing still for World.quiescent
+QUIESCENT_SPEED = 0.01
+# Horizontal input is kept on a 1/1024 grid so replays can store it exactly
+INPUT_SCALE = 1024
+
+
+class FixedTimestep:
+    """Accumulates frame time and reports how many fixed ticks to run.
+
+    Frames on slow devices run several ticks to catch up; fast displays run
+    some frames with no tick and interpolate instead. ``max_steps`` caps the
+    catch-up per frame: any time beyond it is dropped, so a struggling device
+    slows the game down instead of spiralling into ever longer frames.
+    """
+    def __init__(self, tick=TICK, max_steps=5):
+        self.tick = tick
+        self.max_steps = max_steps
+        self.accumulator = 0.0
+
+    def advance(self, dt, max_steps=None):
+        """Add a frame's time and return the number of ticks to simulate.
+
+        ``max_steps`` overrides the cap for this frame only.
+        """
+        if max_steps is None:
+            max_steps = self.max_steps
+        self.accumulator += dt
+        steps = min(int(self.accumulator / self.tick), max_steps)
+        self.accumulator -= steps * self.tick
+        if steps == max_steps:
+            # Drop the backlog we couldn't catch up on
+            self.accumulator = min(self.accumulator, self.tick)
+        return steps
+
+    @property
+    def alpha(self):
+        """Fraction of a tick left over, used to interpolate the drawn state."""
+        return min(1.0, self.accumulator / self.tick)
+
+
+class TankState:
+    """Position, motion and aim of one tank."""
+    __slots__ = ("x", "y", "width", "height", "vx", "vy", "drop_vy",
+                 "facing_left", "cannon_angle", "color_name", "prev_x", "prev_y")
+
+    def __init__(self, color_name, x=0.0, y=0.0, width=100.0, height=100.0):
+        self.color_name = color_name
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+        self.vx = 0.0
+        self.vy = 0.0
+        self.drop_vy = 0.0
+        self.facing_left = False
+        self.cannon_angle = 0
+        self.snap()
+
+    @property
+    def center(self):
+        return self.x + self.width / 2, self.y + self.height / 2
+
+    def snap(self):
+        """Forget the previous position, e.g. after a teleport, so it isn't interpolated."""
+        self.prev_x = self.x
+        self.prev_y = self.y
+
+    def lerp_pos(self, alpha):
+        """Position blended between the last two ticks (0 = previous, 1 = current)."""
+        return self.prev_x + (self.x - self.prev_x) * alpha, self.prev_y + (self.y - self.prev_y) * alpha
+
+    @property
+    def radius(self):
+        """Collision radius; tanks collide as circles."""
+        return min(self.width, self.height) * 0.5
+
+    def rotate_cannon(self, delta_angle):
+        """Rotate cannon within -80° to +80°."""
+        self.cannon_angle = max(-CANNON_LIMIT, min(CANNON_LIMIT, self.cannon_angle + delta_angle))
+
+    def hits_circle(self, cx, cy, radius):
+        tx, ty = self.center
+        dx = tx - cx
+        dy = ty - cy
+        return (dx * dx + dy * dy) ** 0.5 < self.radius + radius
+
+
+def _near_terrain(terrain, x, y, right, top):
+    """Mask of the boxes (given as columns) for which ``terrain.query`` returns any grid.
+
+    Same bucket arithmetic as the query, so it is exact, not an estimate.
+    """
+    cs = terrain.cell_size
+    live = [k for k, grid in enumerate(terrain.grids) if grid.alive]
+    if not live:
+        return np.zeros(len(x), dtype=bool)
+    gi0, gj0, gi1, gj1 = np.array(terrain.grid_buckets)[live].T[:, :, None]
+    return (
+        (np.floor_divide(x, cs) <= gi1) & (np.floor_divide(right, cs) >= gi0)
+        & (np.floor_divide(y, cs) <= gj1) & (np.floor_divide(top, cs) >= gj0)
+    ).any(axis=0)
+
+
+def _nearest_hit(start, hits):
+    """Pick the (grid, position) sweep hit closest to ``start``; (None, None) if none."""
+    best_grid = best = None
+    for grid, pos in hits:
+        if pos is not None and (best is None or abs(pos - start) < abs(best - start)):
+            best_grid, best = grid, pos
+    return best_grid, best
+
+
+class BallState:
+    """Handle to one projectile stored in a ``ProjectileBatch``.
+
+    Reads go straight to the batch's arrays, so views can keep a reference
+    while the batch compacts itself around removed projectiles.
+    """
+    __slots__ = ("batch", "slot", "owner", "size", "launch_vx", "launch_vy")
+
+    def __init__(self, batch, slot, owner=None, size=BALL_SIZE, launch_vx=0.0, launch_vy=0.0):
+        self.batch = batch
+        self.slot = slot
+        self.owner = owner
+        self.size = size
+        # Kept on the handle so they can be reported after the batch lets go
+        self.launch_vx = launch_vx
+        self.launch_vy = launch_vy
+
+    x = property(lambda self: self.batch.x[self.slot])
+    y = property(lambda self: self.batch.y[self.slot])
+    vx = property(lambda self: self.batch.vx[self.slot])
+    vy = property(lambda self: self.batch.vy[self.slot])
+    bounce_count = property(lambda self: self.batch.bounce_count[self.slot])
+    fired = property(lambda self: bool(self.batch.fired[self.slot]))
+
+    @property
+    def center(self):
+        half = self.size / 2
+        return self.x + half, self.y + half
+
+    def lerp_pos(self, alpha):
+        """Position blended between the last two ticks (0 = previous, 1 = current)."""
+        batch, i = self.batch, self.slot
+        px, py = batch.prev_x[i], batch.prev_y[i]
+        return px + (batch.x[i] - px) * alpha, py + (batch.y[i] - py) * alpha
+
+
+class ProjectileBatch:
+    """Every live projectile, stored column-wise in flat arrays.
+
+    Positions, velocities and bounce counts live in one ``array`` per field.
+    ``step`` runs gravity, friction and the floor and side bounces as numpy
+    operations on whole columns, and finds the projectiles near terrain the
+    same way; only those take the per-projectile path through the terrain
+    grids. In open air a salvo of hundreds costs a few dozen column
+    operations per tick. Removal swaps the last projectile into the freed
+    slot, so add and remove are both O(1).
+
+    Below ``VECTOR_MIN`` projectiles numpy's per-call overhead costs more
+    than it saves, so small batches are stepped one projectile at a time.
+    Both paths use the same float arithmetic, so results are bit-identical
+    and replays stay exact whichever one runs.
+    """
+    VECTOR_MIN = 16
+
+    def __init__(self, size=BALL_SIZE, friction=0.99, bounce_limit=2):
+        self.size = size
+        self.friction = friction
+        self.bounce_limit = bounce_limit
+        self.x = array("d")
+        self.y = array("d")
+        self.vx = array("d")
+        self.vy = array("d")
+        self.prev_x = array("d")
+        self.prev_y = array("d")
+        self.gravity = array("d")
+        self.bounce_count = array("i")
+        self.fired = array("b")
+        self.handles = []
+        self._columns = (self.x, self.y, self.vx, self.vy, self.prev_x, self.prev_y,
+                         self.gravity, self.bounce_count, self.fired)
+
+    def __len__(self):
+        return len(self.handles)
+
+    def __iter__(self):
+        return iter(list(self.handles))
+
+    def add(self, x, y, vx, vy, gravity, owner=None):
+        """Append a fired projectile and return its handle."""
+        for column, value in zip(self._columns, (x, y, vx, vy, x, y, gravity, 0, 1)):
+            column.append(value)
+        handle = BallState(self, len(self.handles), owner, self.size, vx, vy)
+        self.handles.append(handle)
+        return handle
+
+    def remove(self, handle):
+        """Drop a projectile by moving the last one into its slot."""
+        i = handle.slot
+        last = len(self.handles) - 1
+        for column in self._columns:
+            if i != last:
+                column[i] = column[last]
+            column.pop()
+        moved = self.handles.pop()
+        if i != last:
+            moved.slot = i
+            self.handles[i] = moved
+        handle.batch = None
+
+    def clear(self):
+        for handle in list(self.handles):
+            self.remove(handle)
+
+    def _views(self):
+        """numpy views of the columns (x, y, vx, vy, gravity, bounce_count, fired).
+
+        They share memory with the arrays, which can't grow or shrink while a
+        view is alive, so they must not outlive the call that made them.
+        """
+        return (
+            np.frombuffer(self.x), np.frombuffer(self.y),
+            np.frombuffer(self.vx), np.frombuffer(self.vy),
+            np.frombuffer(self.gravity),
+            np.frombuffer(self.bounce_count, dtype=np.intc),
+            np.frombuffer(self.fired, dtype=np.int8),
+        )
+
+    def step(self, terrain, bounce_factor, width):
+        """Advance every fired projectile one tick.
+
+        Applies gravity, friction, floor and side bounces, and terrain
+        bounces (which carve a crater where they hit). Return the number of
+        terrain collision tests made.
+        """
+        if not self.handles:
+            return 0
+        self.prev_x[:] = self.x
+        self.prev_y[:] = self.y
+        if len(self.handles) < self.VECTOR_MIN:
+            return sum(self._step_one(i, terrain, bounce_factor, width) for i in range(len(self.handles)))
+        xs, ys, vxs, vys, gravity, bounces, fired = self._views()
+        size = self.size
+        max_x = width - size
+
+        # Gravity, then move with the pre-friction velocity
+        active = fired != 0
+        vy = vys + gravity
+        vx = vxs.copy()
+        new_x = xs + vx
+        new_y = ys + vy
+        vx *= self.friction
+        vy *= self.friction
+
+        # Floor collision
+        floor = active & (new_y < 0)
+        new_y[floor] = 0.0
+        vy[floor] = -vy[floor] * bounce_factor
+        vx[floor] *= 0.8  # Additional ground friction
+        bounces[floor] += 1
+        # Ball settles on the ground
+        settled = floor & (np.abs(vy) < 1) & (np.abs(vx) < 1)
+        moving = active & ~settled
+
+        # Side wall collision
+        side = moving & ((new_x < 0) | (new_x > max_x))
+        vx[side] = -vx[side] * bounce_factor
+        new_x[side] = np.maximum(0.0, np.minimum(new_x[side], max_x))
+        bounces[side] += 1
+
+        # Terrain collision, only for projectiles whose swept box reaches a grid
+        near = moving & _near_terrain(
+            terrain,
+            np.minimum(xs, new_x), np.minimum(ys, new_y),
+            np.maximum(xs, new_x) + size, np.maximum(ys, new_y) + size,
+        )
+        tests = 0
+        for i in np.flatnonzero(near).tolist():
+            x, y, vx_i, vy_i, hits, n = self._collide_terrain(
+                terrain, bounce_factor, xs.item(i), ys.item(i),
+                new_x.item(i), new_y.item(i), vx.item(i), vy.item(i),
+            )
+            new_x[i], new_y[i], vx[i], vy[i] = x, y, vx_i, vy_i
+            bounces[i] += hits
+            tests += n
+
+        xs[moving] = new_x[moving]
+        ys[moving] = new_y[moving]
+        vxs[moving] = vx[moving]
+        vys[moving] = vy[moving]
+
+        # Settled balls, and the two-bounce limit
+        stopped = settled | (moving & (bounces >= self.bounce_limit))
+        vxs[stopped] = 0.0
+        vys[stopped] = 0.0
+        fired[stopped] = 0
+        return tests
+
+    def _step_one(self, i, terrain, bounce_factor, width):
+        """``step`` for the projectile in slot ``i`` alone; return its collision tests."""
+        if not self.fired[i]:
+            return 0
+        friction = self.friction
+        size = self.size
+        max_x = width - size
+
+        # Gravity, then move with the pre-friction velocity
+        vy = self.vy[i] + self.gravity[i]
+        vx = self.vx[i]
+        old_x, old_y = self.x[i], self.y[i]
+        new_x, new_y = old_x + vx, old_y + vy
+        vx *= friction
+        vy *= friction
+
+        # Floor collision
+        if new_y < 0:
+            new_y = 0.0
+            vy = -vy * bounce_factor
+            vx *= 0.8 # Additional ground friction
+            self.bounce_count[i] += 1
+
+            # Ball settles on the ground
+            if abs(vy) < 1 and abs(vx) < 1:
+                self.vx[i] = self.vy[i] = 0.0
+                self.fired[i] = 0
+                return 0
+
+        # Side wall collision
+        if new_x < 0 or new_x > max_x:
+            vx = -vx * bounce_factor
+            new_x = max(0.0, min(new_x, max_x))
+            self.bounce_count[i] += 1
+
+        new_x, new_y, vx, vy, hits, tests = self._collide_terrain(
+            terrain, bounce_factor, old_x, old_y, new_x, new_y, vx, vy,
+        )
+        self.bounce_count[i] += hits
+        self.x[i], self.y[i], self.vx[i], self.vy[i] = new_x, new_y, vx, vy
+
+        # Two-bounce limit
+        if self.bounce_count[i] >= self.bounce_limit:
+            self.vx[i] = self.vy[i] = 0.0
+            self.fired[i] = 0
+        return tests
+
+    def _collide_terrain(self, terrain, bounce_factor, old_x, old_y, new_x, new_y, vx, vy):
+        """Resolve one projectile's move against the terrain grids it reaches.
+
+        Return (x, y, vx, vy, bounces, tests) after the move.
+        """
+        size = self.size
+        half = size / 2
+        bounces = 0
+        grids = terrain.query(
+            min(old_x, new_x), min(old_y, new_y),
+            max(old_x, new_x) + size, max(old_y, new_y) + size,
+        )
+        tests = 2 * len(grids)
+        x = new_x
+        # A move longer than the ball can jump over thin walls the
+        # end position misses, so sweep the cells in between first
+        hit_grid = None
+        dx = new_x - old_x
+        if abs(dx) > size:
+            tests += len(grids)
+            hit_grid, hit_x = _nearest_hit(old_x, [
+                (grid, grid.sweep_x(old_x, old_y, old_x + size, old_y + size, dx)) for grid in grids
+            ])
+        if hit_grid:
+            hit_grid.carve((hit_x + half, old_y + half), 15)
+            x = old_x
+            vx *= -bounce_factor
+            bounces += 1
+        else:
+            for grid in grids:
+                if grid.collides_rect(x, old_y, x + size, old_y + size):
+                    grid.carve((x + half, old_y + half), 15)
+                    x = old_x
+                    vx *= -bounce_factor
+                    bounces += 1
+        y = new_y
+        hit_grid = None
+        dy = new_y - old_y
+        if abs(dy) > size:
+            tests += len(grids)
+            hit_grid, hit_y = _nearest_hit(old_y, [
+                (grid, grid.sweep_y(x, old_y, x + size, old_y + size, dy)) for grid in grids
+            ])
+        if hit_grid:
+            hit_grid.carve((x + half, hit_y + half), 15)
+            y = old_y
+            vy *= -bounce_factor
+            if abs(vy) < 1:
+                vy = 0
+            bounces += 1
+        else:
+            for grid in grids:
+                if grid.collides_rect(x, y, x + size, y + size):
+                    grid.carve((x + half, y + half), 15)
+                    y = old_y
+                    vy *= -bounce_factor
+                    if abs(vy) < 1:
+                        vy = 0
+                    bounces += 1
+        return x, y, vx, vy, bounces, tests
+
+    def first_tank_hit(self, tanks):
+        """Return (slot, tank index) of the first projectile touching a tank, or None.
+
+        A column-wise distance test picks the candidates; ``hits_circle``
+        confirms them in slot order, so the answer matches testing one by one.
+        """
+        if not self.handles:
+            return None
+        half = self.size / 2
+        if len(self.handles) < self.VECTOR_MIN:
+            candidates = range(len(self.handles))
+        else:
+            cx = np.frombuffer(self.x) + half
+            cy = np.frombuffer(self.y) + half
+            near = np.zeros(len(cx), dtype=bool)
+            for tank in tanks:
+                tx, ty = tank.center
+                # Slightly generous, so rounding never drops a real hit
+                reach = (tank.radius + half) * 1.000001
+                near |= (tx - cx) ** 2 + (ty - cy) ** 2 < reach * reach
+            candidates = np.flatnonzero(near).tolist()
+        for i in candidates:
+            bx, by = self.x[i] + half, self.y[i] + half
+            for t, tank in enumerate(tanks):
+                if tank.hits_circle(bx, by, half):
+                    return i, t
+        return None
+
+    def over_terrain(self, terrain, count=None):
+        """Handles, in slot order, of the first ``count`` projectiles whose circle box reaches a grid."""
+        n = len(self.handles) if count is None else count
+        if n < self.VECTOR_MIN:
+            # The caller queries the terrain for each one anyway
+            return self.handles[:n]
+        half = self.size / 2
+        cx = np.frombuffer(self.x)[:n] + half
+        cy = np.frombuffer(self.y)[:n] + half
+        near = _near_terrain(terrain, cx - half, cy - half, cx + half, cy + half)
+        return [self.handles[i] for i in np.flatnonzero(near).tolist()]
+
+    def resting(self):
+        """Handles, in slot order, of projectiles that are no longer fired."""
+        if len(self.handles) < self.VECTOR_MIN:
+            return [handle for handle in self.handles if not self.fired[handle.slot]]
+        fired = np.frombuffer(self.fired, dtype=np.int8)
+        return [self.handles[i] for i in np.flatnonzero(fired == 0).tolist()]
+
+
+class World:
+    """Complete game state for one stage, stepped one tick at a time.
+
+    ``step`` returns a list of events for the view layer:
+    ``("fire", ball)``, ``("settle", ball)``, ``("turn", index)`` and
+    ``("hit", tank_index, ball)``.
+    """
+    # Tunables that change how a match plays out (replays store them)
+    CONFIG = ("friction", "bounce", "cannon_angle_speed", "shots_per_turn", "salvo_spread")
+
+    def __init__(self, tanks, width=0, height=0, seed=0):
+        self.tanks = list(tanks)
+        # All randomness in the simulation must come from rng, so a seed
+        # plus the recorded input reproduces a match
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.balls = ProjectileBatch()
+        self.terrain = TerrainIndex()
+        self.width = width
+        self.height = height
+
+        self.scale_y = 1.0
+        self.gravity = -9.8 * 0.05
+        self.friction = 0.98
+        self.bounce = 0.7
+        self.launch_speed = 20.0
+        self.cannon_angle_speed = 1.0
+
+        # Weapon: projectiles per shot and the fan angle between them
+        self.shots_per_turn = 1
+        self.salvo_spread = 0.0
+
+        self.current_turn = 0
+        self.turn_timer = 10.0
+        self.turn_state = "START_DROP"
+
+        # Held input, set by the view layer: horizontal push and cannon rotation direction
+        self.input_ax = 0.0
+        self.input_rotate = 0
+
+        # Optional profiler.FrameProfiler; phases are only timed when set
+        self.profiler = None
+        self._layout_height = None
+
+    @property
+    def active_tank(self):
+        return self.tanks[self.current_turn]
+
+    def config(self):
+        return {name: getattr(self, name) for name in self.CONFIG}
+
+    def configure(self, **values):
+        """Set tunables from ``CONFIG``, keeping each one's type."""
+        for name, value in values.items():
+            if name not in self.CONFIG:
+                raise KeyError(f"unknown world setting {name!r}")
+            setattr(self, name, type(getattr(self, name))(value))
+
+    def set_input(self, ax, rotate):
+        self.input_ax = round(ax * INPUT_SCALE) / INPUT_SCALE
+        self.input_rotate = rotate
+
+    def layout_tanks(self, width, height):
+        """Size tanks to the stage and place them at their start columns.
+
+        The first call parks them above the screen for the opening drop;
+        later calls (resizes) keep their height relative to the stage.
+        """
+        tank_h = height * 0.10
+        tank_w = tank_h * 1.5 # 1.5:1 aspect ratio
+        old_height = self._layout_height
+        for i, tank in enumerate(self.tanks):
+            tank.width, tank.height = tank_w, tank_h
+            tank.x = width * (0.15 if i == 0 else 0.85) - tank_w / 2
+            if old_height is None:
+                # First time: start above the screen
+                tank.y = height + tank_h
+            else:
+                # Resize: keep same relative Y (e.g., distance from bottom)
+                tank.y = tank.y / old_height * height if old_height else tank.y
+                tank.y *= 1.002
+            tank.snap()
+        self._layout_height = height
+
+        # Facing directions
+        self.tanks[0].facing_left = False
+        self.tanks[1].facing_left = True
+
+    def resize(self, width, height, scale_y):
+        self.width = width
+        self.height = height
+        self.scale_y = scale_y
+        self.gravity = -9.8 * 0.05 * scale_y
+        self.launch_speed = 20.0 * scale_y
+
+    # --- Ball Launch ---
+    def launch_params(self, angle_offset=0.0):
+        """Return (x, y, vx, vy, gravity) a ball fired now would start with."""
+        tank = self.active_tank
+        angle_rad = math.radians(tank.cannon_angle + angle_offset)
+        direction = -1 if tank.facing_left else 1
+
+        vx = self.launch_speed * math.cos(angle_rad) * direction
+        vy = self.launch_speed * math.sin(angle_rad)
+
+        cx, cy = tank.center
+        offset_distance = tank.width * 0.6 * self.scale_y  # distance from tank center
+        spawn_x = cx + math.cos(angle_rad) * offset_distance * direction
+        spawn_y = cy + math.sin(angle_rad) * offset_distance
+
+        return spawn_x - BALL_SIZE / 2, spawn_y - BALL_SIZE / 2, vx, vy, self.gravity * self.scale_y
+
+    def launch_ball(self, angle_offset=0.0):
+        """Spawn a ball just outside the active tank's cannon and return it."""
+        return self.balls.add(*self.launch_params(angle_offset), owner=self.current_turn)
+
+    def launch_salvo(self):
+        """Fire ``shots_per_turn`` balls fanned ``salvo_spread`` degrees apart."""
+        count = max(1, self.shots_per_turn)
+        first = -self.salvo_spread * (count - 1) / 2
+        return [self.launch_ball(first + k * self.salvo_spread) for k in range(count)]
+
+    def switch_turn(self):
+        """Hand control to the next tank."""
+        self.current_turn = (self.current_turn + 1) % len(self.tanks)
+        self.active_tank.facing_left = self.current_turn == 1
+        self.active_tank.vx = self.active_tank.vy = 0
+        self.turn_timer = 10.0
+        self.turn_state = "INPUT"
+
+    def quiescent(self):
+        """True while a tick can change nothing but the turn timer.
+
+        That is: aiming with no input held, no ball in flight and every
+        tank standing still.
+        """
+        if self.turn_state != "INPUT" or self.balls or self.input_ax or self.input_rotate:
+            return False
+        return all(
+            abs(tank.vx) < QUIESCENT_SPEED and abs(tank.vy) < QUIESCENT_SPEED
+            for tank in self.tanks
+        )
+
+    # --- Simulation ---
+    def step(self, dt=TICK):
+        """Advance the world by one tick and return the events it produced."""
+        events = []
+        if self.turn_state == "GAME_OVER":
+            return events
+
+        prof = self.profiler
+        for tank in self.tanks:
+            tank.snap()
+
+        if self.turn_state == "START_DROP":
+            if prof: start = prof.clock()
+            self._step_drop()
+            if prof: prof.add("drop", start)
+
+        # --- Turn timer ---
+        if self.turn_state == "INPUT":
+            self.turn_timer -= dt * self.scale_y
+            if self.turn_timer <= 0:
+                events.extend(("fire", ball) for ball in self.launch_salvo())
+                self.turn_state = "FIRING"
+                self.active_tank.vx = self.active_tank.vy = 0
+
+        if self.turn_state == "INPUT":
+            if prof: start = prof.clock()
+            new_x, new_y = self._drive_tank(self.active_tank)
+            if prof:
+                prof.add("input", start)
+                start = prof.clock()
+            tests = self._collide_tank(self.active_tank, new_x, new_y)
+            if prof:
+                prof.add("tank_wall", start)
+                prof.count("collision_tests", tests)
+
+        # --- Ball updates ---
+        if prof: start = prof.clock()
+        tests = self.balls.step(self.terrain, self.bounce, self.width)
+        if prof:
+            prof.add("ball", start)
+            prof.count("collision_tests", tests)
+            start = prof.clock()
+        # Tank hits end the game immediately, after the balls before the hit carve
+        hit = self.balls.first_tank_hit(self.tanks)
+        # Destroy wall blocks (only grids under a ball can lose any)
+        for ball in self.balls.over_terrain(self.terrain, hit[0] if hit else None):
+            bx, by = ball.center
+            r = ball.size / 2
+            for grid in self.terrain.query(bx - r, by - r, bx + r, by + r):
+                grid.carve((bx, by), r)
+        if hit:
+            self.turn_state = "GAME_OVER"
+            events.append(("hit", hit[1], self.balls.handles[hit[0]]))
+            if prof: prof.add("crater", start)
+            return events
+        settled = self.balls.resting()
+        if prof:
+            prof.add("crater", start)
+            prof.count("collision_tests", len(self.tanks) * len(self.balls))
+
+        if settled and self.turn_state == "FIRING":
+            for ball in settled:
+                events.append(("settle", ball))
+                self.balls.remove(ball)
+
+            if not self.balls:
+                self.switch_turn()
+                events.append(("turn", self.current_turn))
+
+        return events
+
+    def _step_drop(self):
+        """Drop every tank onto the floor or the wall below it."""
+        all_settled = True
+        for tank in self.tanks:
+            tank.drop_vy += self.gravity
+            new_y = tank.y + tank.drop_vy
+
+            # Check collisions with floor or walls
+            collision_y = 1  # floor
+            # Only walls under the fall this tick; pad for rects a bit larger than their blocks
+            pad = self.terrain.block_pad
+            for grid in self.terrain.query(tank.x - pad, new_y - pad, tank.x + tank.width + pad, tank.y + pad):
+                wx, wy, ww, wh = grid.rect
+                if (tank.x + tank.width > wx and tank.x < wx + ww) and (new_y <= wy + wh <= tank.y):
+                    collision_y = max(collision_y, wy + wh)
+
+            if new_y <= collision_y:
+                new_y = collision_y
+                tank.drop_vy = 0
+            else:
+                all_settled = False
+
+            tank.y = new_y
+
+        if all_settled:
+            self.turn_state = "INPUT"
+            self.active_tank.vx = self.active_tank.vy = 0
+            self.turn_timer = 10.0
+
+    def _drive_tank(self, tank):
+        """Apply held input to the active tank; return its unresolved new position."""
+        if self.input_rotate:
+            tank.rotate_cannon(self.input_rotate * self.cannon_angle_speed)
+
+        tank.vx += self.input_ax
+        tank.vy += self.gravity
+        tank.vx *= self.friction
+        tank.vy *= self.friction
+
+        new_x = tank.x + tank.vx
+        new_y = tank.y + tank.vy
+        tank_w, tank_h = tank.width, tank.height
+
+        # Screen boundaries
+        if new_x < 0: new_x, tank.vx = 0, -tank.vx * self.bounce
+        elif new_x + tank_w > self.width: new_x, tank.vx = self.width - tank_w, -tank.vx * self.bounce
+        if new_y < 0: new_y, tank.vy = 0, -tank.vy * self.bounce
+        elif new_y + tank_h > self.height: new_y, tank.vy = self.height - tank_h, -tank.vy * self.bounce
+        return new_x, new_y
+
+    def _collide_tank(self, tank, new_x, new_y):
+        """Resolve the active tank against nearby blocks, then move it.
+
+        Return the number of block tests made.
+        """
+        new_x, new_y, nx, ny, depth, tests = self._contact(tank, new_x, new_y)
+        if depth:
+            # Bounce off the combined surface, only if moving into it; slow
+            # impacts come to rest so a parked tank doesn't hop in place
+            vn = tank.vx * nx + tank.vy * ny
+            if vn < 0:
+                restitution = self.bounce if vn < -TANK_REST_SPEED else 0.0
+                tank.vx -= (1 + restitution) * vn * nx
+                tank.vy -= (1 + restitution) * vn * ny
+
+        # Auto-flip tank based on velocity
+        if tank.vx > 0.1 and tank.facing_left:
+            tank.facing_left = False
+        elif tank.vx < -0.1 and not tank.facing_left:
+            tank.facing_left = True
+
+        tank.x, tank.y = new_x, new_y
+        return tests
+
+    def _contact(self, tank, new_x, new_y):
+        """Contact manifold for the tank against nearby blocks.
+
+        Every touching block votes for pushing the tank's box out along the
+        axis it is closest to; the votes are merged into one push per side,
+        so several blocks can't fight over the tank's position. Return the
+        resolved (x, y), the push as a unit normal (nx, ny) and depth, and
+        the number of block tests made.
+        """
+        tank_w, tank_h = tank.width, tank.height
+        tests = 0
+        below = above = left = right = None
+
+        # Only blocks within reach of the collision circle where the tank is
+        # headed are tested
+        radius = tank.radius
+        pad = radius + self.terrain.block_pad
+        cx, cy = new_x + tank_w / 2, new_y + tank_h / 2
+        for grid in self.terrain.query(cx - pad, cy - pad, cx + pad, cy + pad):
+            for block in grid.blocks_in_rect(cx - pad, cy - pad, cx + pad, cy + pad):
+                tests += 1
+                reach = radius + max(block.width, block.height) * 0.5
+                if math.hypot(cx - block.center_x, cy - block.center_y) >= reach:
+                    continue
+                if abs(cx - block.center_x) > abs(cy - block.center_y):
+                    if cx < block.center_x:
+                        right = block.x if right is None else min(right, block.x)
+                    else:
+                        left = block.right if left is None else max(left, block.right)
+                elif cy < block.center_y:
+                    above = block.y if above is None else min(above, block.y)
+                else:
+                    below = block.top if below is None else max(below, block.top)
+
+        x, y = new_x, new_y
+        if left is not None:
+            x = left
+        if right is not None:
+            x = right - tank_w if left is None else (x + right - tank_w) / 2
+        if below is not None:
+            y = below
+        if above is not None:
+            y = above - tank_h if below is None else (y + above - tank_h) / 2
+
+        dx, dy = x - new_x, y - new_y
+        depth = math.hypot(dx, dy)
+        if not depth:
+            return x, y, 0.0, 0.0, 0.0, tests
+        return x, y, dx / depth, dy / depth, depth, tests
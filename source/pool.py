@@ -0,0 +1,118 @@
+"""Reusable object pools for short-lived game objects.
+
+Projectiles, and later explosion and debris effects, come and go many
+times per second during rapid fire. Pooling them keeps their widgets,
+canvas instructions and bindings alive between uses instead of building
+and discarding them per shot. ``LRUCache`` does the same for bigger,
+keyed objects such as whole stages.
+"""
+from collections import OrderedDict
+
+
+class ObjectPool:
+    """Free list of objects made by ``factory``, holding at most ``capacity`` idle ones.
+
+    ``acquire`` and ``release`` are O(1). Objects released while the pool is
+    full are dropped for the garbage collector, so a burst never pins more
+    than ``capacity`` idle objects. ``reset`` (optional) is called on every
+    released object to clear per-use state.
+    """
+    def __init__(self, factory, capacity=32, reset=None, prefill=0):
+        self.factory = factory
+        self.capacity = capacity
+        self.reset = reset
+        self._free = [factory() for _ in range(min(prefill, capacity))]
+        self.created = len(self._free)
+        self.reused = 0
+        self.in_use = 0
+
+    def __len__(self):
+        """Number of idle objects ready to hand out."""
+        return len(self._free)
+
+    def acquire(self):
+        self.in_use += 1
+        if self._free:
+            self.reused += 1
+            return self._free.pop()
+        self.created += 1
+        return self.factory()
+
+    def release(self, obj):
+        self.in_use -= 1
+        if len(self._free) >= self.capacity:
+            return
+        if self.reset:
+            self.reset(obj)
+        self._free.append(obj)
+
+    def clear(self):
+        self._free.clear()
+
+
+class LRUCache:
+    """Keyed store of reusable objects that drops the least recently stored first.
+
+    Keeps at most ``capacity`` entries whose ``cost(obj)`` adds up to at
+    most ``max_cost`` (no limit if None). ``pop`` takes an entry out for
+    use; ``put`` hands it back. ``on_evict(obj)`` (optional) is called for
+    every entry dropped to make room.
+    """
+    def __init__(self, capacity=4, max_cost=None, cost=None, on_evict=None):
+        self.capacity = capacity
+        self.max_cost = max_cost
+        self.cost = cost or (lambda obj: 0)
+        self.on_evict = on_evict
+        self._entries = OrderedDict()
+        self.total_cost = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def values(self):
+        """Cached objects, least recently stored first."""
+        return [obj for obj, _ in self._entries.values()]
+
+    def pop(self, key):
+        """Remove and return the entry for ``key``, or None."""
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        obj, cost = entry
+        self.total_cost -= cost
+        return obj
+
+    def put(self, key, obj):
+        """Store ``obj`` as the most recent entry, evicting older ones over the limits."""
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self.total_cost -= old[1]
+            if old[0] is not obj:
+                self._evict(old[0])
+        cost = self.cost(obj)
+        self._entries[key] = (obj, cost)
+        self.total_cost += cost
+        while self._entries and (
+            len(self._entries) > self.capacity
+            or (self.max_cost is not None and self.total_cost > self.max_cost)
+        ):
+            _, (evicted, evicted_cost) = self._entries.popitem(last=False)
+            self.total_cost -= evicted_cost
+            self._evict(evicted)
+
+    def clear(self):
+        while self._entries:
+            _, (obj, cost) = self._entries.popitem(last=False)
+            self._evict(obj)
+        self.total_cost = 0
+
+    def _evict(self, obj):
+        if self.on_evict:
+            self.on_evict(obj)
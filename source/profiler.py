@@ -0,0 +1,84 @@
+"""Opt-in frame-time instrumentation for the game loop.
+
+``FrameProfiler`` collects per-phase timings and per-frame counters into a
+bounded history. The game loop only calls into it when profiling is on, so
+a disabled profiler costs one ``None`` check per phase.
+"""
+import csv
+import json
+import time
+from collections import deque
+
+PHASES = ("drop", "input", "tank_wall", "ball", "crater", "draw")
+COUNTERS = ("ticks", "collision_tests", "instructions")
+
+
+class FrameProfiler:
+    """Per-frame phase timings (ms) and counters, kept for the last ``history`` frames."""
+
+    clock = staticmethod(time.perf_counter)
+
+    def __init__(self, history=600):
+        self.frames = deque(maxlen=history)
+        self._current = None
+        self._frame_start = 0.0
+
+    def begin_frame(self):
+        self._current = dict.fromkeys(PHASES + COUNTERS, 0)
+        self._frame_start = self.clock()
+
+    def end_frame(self):
+        """Close the frame and return its record."""
+        frame = self._current
+        if frame is None:
+            return None
+        frame["frame"] = (self.clock() - self._frame_start) * 1000.0
+        self.frames.append(frame)
+        self._current = None
+        return frame
+
+    def add(self, phase, start):
+        """Charge the time since ``start`` (a ``clock()`` reading) to ``phase``."""
+        if self._current is not None:
+            self._current[phase] += (self.clock() - start) * 1000.0
+
+    def count(self, counter, n=1):
+        if self._current is not None:
+            self._current[counter] += n
+
+    def summary(self):
+        """Return {column: (mean, max)} over the recorded frames."""
+        if not self.frames:
+            return {}
+        result = {}
+        for key in ("frame",) + PHASES + COUNTERS:
+            values = [frame[key] for frame in self.frames]
+            result[key] = (sum(values) / len(values), max(values))
+        return result
+
+    def format_overlay(self):
+        """Short multi-line text for the on-screen overlay."""
+        stats = self.summary()
+        if not stats:
+            return ""
+        lines = [f"frame {stats['frame'][0]:.2f} ms (max {stats['frame'][1]:.2f})"]
+        lines += [f"{phase:<9} {stats[phase][0]:.2f} / {stats[phase][1]:.2f}" for phase in PHASES]
+        lines += [f"{counter:<9} {stats[counter][0]:.0f} / {stats[counter][1]:.0f}" for counter in COUNTERS]
+        return "\n".join(lines)
+
+    def export_csv(self, path):
+        columns = ("frame",) + PHASES + COUNTERS
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(columns)
+            for frame in self.frames:
+                writer.writerow([frame[key] for key in columns])
+
+    def export_json(self, path, **meta):
+        """Write the trace plus a summary; ``meta`` (build, device...) is stored alongside."""
+        with open(path, "w") as f:
+            json.dump({
+                "meta": meta,
+                "summary": {key: {"mean": mean, "max": peak} for key, (mean, peak) in self.summary().items()},
+                "frames": list(self.frames),
+            }, f, indent=1)
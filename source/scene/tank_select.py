@@ -1,5 +1,3 @@
-import os
-
 from kivy.uix.screenmanager import Screen
 from kivy.uix.carousel import Carousel
 from kivy.uix.image import Image
@@ -9,6 +7,8 @@ from kivy.uix.button import Button
 from kivy.metrics import dp
 from kivy.clock import Clock
 
+import assets
+
 class TankCarousel(Carousel):
     """
     A custom Carousel that dynamically scales tanks to simulate depth.
@@ -21,14 +21,10 @@ class TankCarousel(Carousel):
         self.direction = 'right' # Set initial rotation direction
         self.bind(index=self.update_tank_size)
         
-        # Create Image widgets for each tank
+        # Create Image widgets for each tank (textures preloaded by the welcome screen)
         for color in self.TANK_COLORS:
-            base_path = os.path.join(os.path.dirname(__file__), "..", "resource", "tankImage", color)
-            tank_path = os.path.join(base_path, "full.png")
-            tank_path = os.path.abspath(tank_path) 
-
             tank_image = Image(
-                source=tank_path,
+                texture=assets.texture(f"tankImage/{color}/full.png"),
                 size_hint=(None, None),
                 allow_stretch=True,
                 keep_ratio=True
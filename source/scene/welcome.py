@@ -12,6 +12,8 @@ from kivy.uix.button import Button
 from kivy.uix.behaviors import ButtonBehavior
 from kivy.uix.screenmanager import Screen
 
+import assets
+
 
 BASE_DIR = os.path.dirname(__file__)
 
@@ -19,12 +21,12 @@ BASE_DIR = os.path.dirname(__file__)
 class PawButton(ButtonBehavior, FloatLayout):
     """Custom button with a paw image and centered label."""
 
-    def __init__(self, image_source, text, **kwargs):
+    def __init__(self, texture, text, **kwargs):
         super().__init__(**kwargs)
 
         # Paw image
         self.image = Image(
-            source=image_source,
+            texture=texture,
             size_hint=(0.5, 0.5),
             pos_hint={"x": 0.02, "y": 0.1},
             allow_stretch=True,
@@ -110,12 +112,12 @@ class WelcomeScreen(Screen):
         # Paths
         project_dir = os.path.dirname(BASE_DIR)
         resource_dir = os.path.join(project_dir, "resource")
-        background_path = os.path.join(resource_dir, "background.jpg")
-        paw_path = os.path.join(resource_dir, "paw.png")
+        # Shown on the first frame, so these two load right away
+        paw_texture = assets.texture("paw.png")
 
         # Background image
         self.bg = Image(
-            source=background_path,
+            texture=assets.texture("background.jpg"),
             size_hint=(1, 1),
             pos=(0, 0),
             allow_stretch=True,
@@ -142,7 +144,7 @@ class WelcomeScreen(Screen):
 
         # Start button
         self.start_button = PawButton(
-            image_source=paw_path,
+            texture=paw_texture,
             text="Start Game",
         )
         self.start_button.bind(on_press=lambda *a: self.change_scene("tank_select" ))
@@ -150,7 +152,7 @@ class WelcomeScreen(Screen):
 
         # Paw stamp (animated)
         self.paw = Image(
-            source=paw_path,
+            texture=paw_texture,
             size_hint=(0.2, 0.2),
             opacity=0,
         )
@@ -172,14 +174,22 @@ class WelcomeScreen(Screen):
         )
         Window.bind(size=lambda *a: (self.update_title_font(), self.update_title_and_paw()))
 
-        # Sounds
-        self.sound_boom = SoundLoader.load(os.path.join(resource_dir, "boom.wav"))
-        self.sound_paw = SoundLoader.load(os.path.join(resource_dir, "boom.wav"))
+        # Sounds load after the first frame is on screen (before the title animates)
+        self.sound_boom = self.sound_paw = None
+        Clock.schedule_once(lambda dt: self._load_sounds(resource_dir), 0)
 
         # Initial animations
         Clock.schedule_once(lambda dt: self.animate_title(), 0.5)
         Clock.schedule_once(lambda dt: self.update_paw_position(), 0.1)
 
+    def on_enter(self, *args):
+        # Load the menu and stage sprites while the title animates
+        assets.preload()
+
+    def _load_sounds(self, resource_dir):
+        self.sound_boom = SoundLoader.load(os.path.join(resource_dir, "boom.wav"))
+        self.sound_paw = SoundLoader.load(os.path.join(resource_dir, "boom.wav"))
+
     # --- Scene & UI updates ---
 
     def change_scene(self, scene_name):
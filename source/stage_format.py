@@ -0,0 +1,165 @@
+"""Stage files: JSON for authoring, a compiled binary for loading.
+
+A stage is authored as ``stages/<name>.json``::
+
+    {"name": "Stage 1-1",
+     "walls": [{"rect": [0.0, 0.0, 1.0, 0.02], "note": "ground"}, ...]}
+
+where each rect is ``(nx, ny, nw, nh)`` in fractions of the stage size.
+
+``tools/compile_stages.py`` pre-rasterizes each stage at reference
+resolutions into ``stages/<name>.kks``: for every resolution, every wall's
+RGBA texels (the radial gradient, alpha doubling as block occupancy), laid
+out uncompressed so the runtime can ``mmap`` the file and copy a wall out
+with one slice. A stage size without a compiled raster, or a compiled file
+that no longer matches its JSON, falls back to rasterizing at runtime.
+"""
+import json
+import mmap
+import os
+import struct
+import zlib
+
+from terrain import TerrainGrid, radial_gradient, stage_wall_rects
+
+STAGE_DIR = os.path.join(os.path.dirname(__file__), "stages")
+
+MAGIC = b"KKST"
+VERSION = 1
+
+# Block size and thin-wall thickness in dp; stages scale them by screen density
+BLOCK_DP = 5
+THICKNESS_DP = 3
+
+# Sizes compiled by default: desktop windows and common phones, as (width, height, density)
+REFERENCE_RESOLUTIONS = (
+    (1280, 720, 1.0),
+    (1920, 1080, 1.0),
+    (2560, 1440, 1.0),
+    (2400, 1080, 2.625),
+)
+
+_HEADER = struct.Struct("<4sBIH")   # magic, version, walls CRC, raster count
+_ENTRY = struct.Struct("<4dI")      # width, height, block size, thickness, offset
+_WALL = struct.Struct("<II")        # cols, rows; cols * rows * 4 texel bytes follow
+
+# Texel alpha -> cell occupancy
+_SOLID = bytes([0] + [1] * 255)
+
+
+def walls_crc(walls):
+    """CRC32 of the wall layout, to tell whether a compiled file is stale."""
+    return zlib.crc32(b"".join(struct.pack("<4d", *wall) for wall in walls))
+
+
+def _key(width, height, block_size, thickness):
+    return tuple(round(value, 4) for value in (width, height, block_size, thickness))
+
+
+def rasterize(walls, width, height, block_size, thickness):
+    """Return [(cols, rows, rgba bytearray)] for every wall, as ``Wall.rebuild_blocks`` draws them."""
+    rasters = []
+    for x, y, w, h in stage_wall_rects(walls, width, height, thickness):
+        grid = TerrainGrid.for_rect(x, y, w, h, block_size)
+        rasters.append((grid.cols, grid.rows, radial_gradient(grid.cols, grid.rows, block_size, w, h)))
+    return rasters
+
+
+class Raster:
+    """One wall's precompiled texels, read from the stage file on demand."""
+    __slots__ = ("cols", "rows", "_data", "_offset")
+
+    def __init__(self, cols, rows, data, offset):
+        self.cols = cols
+        self.rows = rows
+        self._data = data
+        self._offset = offset
+
+    def load(self):
+        """Return new (cells, pixels) bytearrays: occupancy per block and RGBA texels."""
+        pixels = bytearray(self._data[self._offset:self._offset + self.cols * self.rows * 4])
+        return pixels[3::4].translate(_SOLID), pixels
+
+
+class StageData:
+    """A loaded stage: its name, wall layout and any compiled rasters."""
+
+    def __init__(self, name, title, walls):
+        self.name = name
+        self.title = title
+        self.walls = walls
+        self._data = None
+        self._entries = {}
+
+    @classmethod
+    def from_json(cls, name, text):
+        spec = json.loads(text)
+        walls = [tuple(float(v) for v in wall["rect"]) for wall in spec["walls"]]
+        return cls(name, spec.get("name", name), walls)
+
+    def attach(self, data):
+        """Use the compiled stage in ``data`` (bytes or mmap); False if it's stale or invalid."""
+        if len(data) < _HEADER.size:
+            return False
+        magic, version, crc, count = _HEADER.unpack_from(data, 0)
+        if magic != MAGIC or version != VERSION or crc != walls_crc(self.walls):
+            return False
+        entries = {}
+        pos = _HEADER.size
+        for _ in range(count):
+            width, height, block_size, thickness, offset = _ENTRY.unpack_from(data, pos)
+            entries[_key(width, height, block_size, thickness)] = offset
+            pos += _ENTRY.size
+        self._data = data
+        self._entries = entries
+        return True
+
+    def rasters(self, width, height, block_size, thickness):
+        """Compiled [Raster] for one wall each at this stage size, or None."""
+        offset = self._entries.get(_key(width, height, block_size, thickness))
+        if offset is None:
+            return None
+        rasters = []
+        for _ in self.walls:
+            cols, rows = _WALL.unpack_from(self._data, offset)
+            offset += _WALL.size
+            rasters.append(Raster(cols, rows, self._data, offset))
+            offset += cols * rows * 4
+        return rasters
+
+    def close(self):
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+        self._data = None
+        self._entries = {}
+
+
+def load_stage(name, directory=STAGE_DIR):
+    """Load ``<name>.json`` and map ``<name>.kks`` next to it when it is up to date."""
+    with open(os.path.join(directory, f"{name}.json"), encoding="utf-8") as f:
+        stage = StageData.from_json(name, f.read())
+    path = os.path.join(directory, f"{name}.kks")
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            try:
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except (OSError, ValueError):
+                data = f.read()
+        if not stage.attach(data) and isinstance(data, mmap.mmap):
+            data.close()
+    return stage
+
+
+def compile_stage(stage, resolutions=REFERENCE_RESOLUTIONS):
+    """Return the compiled ``.kks`` bytes for ``stage`` at ``(width, height, density)`` sizes."""
+    table = []
+    body = bytearray()
+    start = _HEADER.size + _ENTRY.size * len(resolutions)
+    for width, height, density in resolutions:
+        block_size, thickness = BLOCK_DP * density, THICKNESS_DP * density
+        table.append(_ENTRY.pack(width, height, block_size, thickness, start + len(body)))
+        for cols, rows, pixels in rasterize(stage.walls, width, height, block_size, thickness):
+            body += _WALL.pack(cols, rows)
+            body += pixels
+    header = _HEADER.pack(MAGIC, VERSION, walls_crc(stage.walls), len(resolutions))
+    return header + b"".join(table) + bytes(body)
@@ -1,36 +1,101 @@
 # stage_template.py
 from kivy.metrics import dp
-from Wall import Wall
+from kivy.clock import Clock
+from Wall import TerrainAtlas, Wall
+from terrain import TerrainIndex, stage_wall_rects
+from stage_format import BLOCK_DP, THICKNESS_DP, load_stage
 from game_system import BaseStage
 
 class StageTemplate(BaseStage):
-    WALL_THICKNESS = dp(3)
+    # Name of the stage file in stages/ that subclasses play
+    STAGE = None
+    BLOCK_SIZE = dp(BLOCK_DP)
+    WALL_THICKNESS = dp(THICKNESS_DP)
+    # Seconds without a size event before walls are re-rasterized
+    REBUILD_DELAY = 0.3
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        # Layout from the JSON, plus precompiled terrain when the .kks is up to date
+        self.stage_data = load_stage(self.STAGE)
+        self.wall_defs = self.stage_data.walls
 
     def on_enter(self, *args):
         super().on_enter(*args)
+        self._rebuild_event = Clock.create_trigger(self._on_rebuild_timer, self.REBUILD_DELAY)
+        self.game.rebuild_terrain = self._rebuild_walls
 
-        # Create Wall widgets from definitions
-        self.game.walls = [
-            Wall(pos=(0, 0), size=(0, 0), block_size=dp(5))
-            for _ in self.wall_defs
-        ]
-        for wall in self.game.walls:
-            self.game.add_widget(wall)
+        # Create Wall widgets from definitions once; a cached game keeps them
+        if not self.game.walls:
+            # They share one terrain texture
+            self.game.terrain_atlas = TerrainAtlas()
+            self.game.walls = [
+                Wall(pos=(0, 0), size=(0, 0), block_size=self.BLOCK_SIZE)
+                for _ in self.wall_defs
+            ]
+            for wall in self.game.walls:
+                wall.atlas = self.game.terrain_atlas
+                self.game.add_widget(wall)
 
-        # Bind resize handler
+        # Bind resize handler (unbound on leave)
         self.game.bind(size=self._reposition_walls)
         self._reposition_walls()
+        # A cached stage entered at another size starts from walls rasterized
+        # for it, like a fresh one, so recorded matches replay from the same terrain
+        if any(wall.needs_rebuild() for wall in self.game.walls):
+            self._rebuild_event.cancel()
+            self._rebuild_walls()
 
         # Pass wall list to tanks
         for tank in self.game.full_tanks:
             tank.walls = self.game.walls
 
+    def on_leave(self, *args):
+        if self.game is not None:
+            self._rebuild_event.cancel()
+            self.game.unbind(size=self._reposition_walls)
+            self.game.rebuild_terrain = None
+        super().on_leave(*args)
+
     def _reposition_walls(self, *args):
-        gw, gh = self.game.width, self.game.height
-        for wall, (nx, ny, nw, nh) in zip(self.game.walls, self.wall_defs):
-            wall.pos = (gw * nx, gh * ny)
-            wall.size = (
-                gw * nw if nw > 0 else self.WALL_THICKNESS,
-                gh * nh if nh > 0 else self.WALL_THICKNESS,
-            )
-            wall.rebuild_blocks()
+        """Stretch walls to the new stage size; re-rasterize once resizing stops."""
+        rects = stage_wall_rects(self.wall_defs, self.game.width, self.game.height, self.WALL_THICKNESS)
+        rasters = self._wall_rasters()
+        for i, (wall, (x, y, w, h)) in enumerate(zip(self.game.walls, rects)):
+            wall.pos = (x, y)
+            wall.size = (w, h)
+            wall.relayout(rasters[i] if rasters else None)
+
+        self.game.terrain_atlas.update(self.game.walls)
+        self._reindex_walls()
+
+        # Restart the countdown on every size event (debounce); a replay
+        # rebuilds at the recorded tick instead
+        if not self.game.player and any(wall.needs_rebuild() for wall in self.game.walls):
+            self._rebuild_event.cancel()
+            self._rebuild_event()
+
+    def _on_rebuild_timer(self, dt):
+        if self.game.player:
+            return
+        if self.game.recorder:
+            # It changes the terrain, so playback must do it at the same tick
+            self.game.recorder.rebuild()
+        self._rebuild_walls()
+
+    def _rebuild_walls(self):
+        """Re-rasterize stretched walls at their final size, keeping craters."""
+        rasters = self._wall_rasters()
+        for i, wall in enumerate(self.game.walls):
+            if wall.needs_rebuild():
+                wall.rebuild_blocks(rasters[i] if rasters else None)
+        self.game.terrain_atlas.update(self.game.walls)
+        self._reindex_walls()
+
+    def _wall_rasters(self):
+        """Compiled terrain for the current stage size, or None to rasterize at runtime."""
+        return self.stage_data.rasters(self.game.width, self.game.height, self.BLOCK_SIZE, self.WALL_THICKNESS)
+
+    def _reindex_walls(self):
+        # Wall bounds changed, so re-hash them into the broadphase
+        self.game.world.terrain = TerrainIndex([wall.grid for wall in self.game.walls], cell_size=dp(50))
@@ -0,0 +1,362 @@
+import math
+
+
+class Block:
+    """Lightweight, read-only view of one solid terrain cell.
+
+    Exposes the same geometry attributes as a Kivy widget (x, y, right, top,
+    center...) so existing collision code can treat it like the old block
+    widgets without paying for a widget per cell.
+    """
+    __slots__ = ("x", "y", "width", "height")
+
+    def __init__(self, x, y, width, height):
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+
+    @property
+    def right(self):
+        return self.x + self.width
+
+    @property
+    def top(self):
+        return self.y + self.height
+
+    @property
+    def center_x(self):
+        return self.x + self.width / 2
+
+    @property
+    def center_y(self):
+        return self.y + self.height / 2
+
+    @property
+    def center(self):
+        return self.center_x, self.center_y
+
+    @property
+    def pos(self):
+        return self.x, self.y
+
+    @property
+    def size(self):
+        return self.width, self.height
+
+
+class TerrainGrid:
+    """Occupancy bitmap for destructible terrain, one byte per block.
+
+    Cell (i, j) is column i from the left and row j from the bottom, stored
+    row-major so a row maps directly onto one texture row.
+
+    Cells are addressed in grid space; ``place`` sets the transform onto the
+    stage (origin plus cell width and height), so a resize only moves and
+    stretches the grid without touching the occupancy or its craters.
+    ``rect`` is the wall rectangle it belongs to, which can be a little
+    larger or smaller than the block area.
+    """
+    __slots__ = ("cols", "rows", "cells", "alive", "x", "y", "cell_w", "cell_h", "rect", "dirty", "version")
+
+    def __init__(self, cols, rows, x=0, y=0, block_size=1, rect=None, fill=1):
+        self.cols = cols
+        self.rows = rows
+        self.cells = bytearray([1 if fill else 0]) * (cols * rows)
+        self.alive = cols * rows if fill else 0
+        # (row, i0, i1) spans cleared since the last redraw
+        self.dirty = []
+        # Bumped on every change so views can cache derived data
+        self.version = 0
+        self.place(x, y, block_size, block_size, rect)
+
+    @classmethod
+    def for_rect(cls, x, y, width, height, block_size):
+        """Rasterize a wall rectangle into square ``block_size`` cells.
+
+        Blocks start at the rectangle's origin; a partial block at the far edge
+        is dropped, but every wall gets at least one block per axis.
+        """
+        cols = max(1, int(width / block_size))
+        rows = max(1, int(height / block_size))
+        return cls(cols, rows, x, y, block_size, rect=(x, y, width, height))
+
+    def place(self, x, y, cell_w, cell_h, rect=None):
+        """Set where the grid sits on the stage and how big its cells are."""
+        self.x = x
+        self.y = y
+        self.cell_w = cell_w
+        self.cell_h = cell_h
+        self.rect = rect or (x, y, self.cols * cell_w, self.rows * cell_h)
+        self.version += 1
+
+    @property
+    def block_size(self):
+        """Largest cell dimension, for padding queries."""
+        return max(self.cell_w, self.cell_h)
+
+    def index(self, i, j):
+        return j * self.cols + i
+
+    def is_solid(self, i, j):
+        return self.cells[j * self.cols + i] != 0
+
+    def bounds(self):
+        """Return (x, y, right, top) of the area covered by blocks."""
+        return self.x, self.y, self.x + self.cols * self.cell_w, self.y + self.rows * self.cell_h
+
+    def clear_span(self, j, i0, i1):
+        """Clear cells i0..i1 (inclusive) of row j in one slice write.
+
+        Return how many of them were solid.
+        """
+        start = j * self.cols + i0
+        stop = j * self.cols + i1 + 1
+        count = self.cells.count(1, start, stop)
+        if count:
+            self.cells[start:stop] = bytes(stop - start)
+            self.alive -= count
+            self.dirty.append((j, i0, i1))
+            self.version += 1
+        return count
+
+    def cell_range(self, x, y, right, top):
+        """Return clamped (i0, j0, i1, j1) of cells touching the rectangle.
+
+        Edges count as touching, matching ``Widget.collide_widget``. The range
+        is empty (i0 > i1 or j0 > j1) when the rectangle misses the grid.
+        """
+        cw, ch = self.cell_w, self.cell_h
+        i0 = max(0, math.ceil((x - self.x) / cw - 1))
+        j0 = max(0, math.ceil((y - self.y) / ch - 1))
+        i1 = min(self.cols - 1, math.floor((right - self.x) / cw))
+        j1 = min(self.rows - 1, math.floor((top - self.y) / ch))
+        return i0, j0, i1, j1
+
+    def blocks_in_rect(self, x, y, right, top):
+        """Yield solid blocks touching the rectangle."""
+        i0, j0, i1, j1 = self.cell_range(x, y, right, top)
+        cw, ch = self.cell_w, self.cell_h
+        cells = self.cells
+        for j in range(j0, j1 + 1):
+            row = j * self.cols
+            for i in range(i0, i1 + 1):
+                if cells[row + i]:
+                    yield Block(self.x + i * cw, self.y + j * ch, cw, ch)
+
+    def collides_rect(self, x, y, right, top):
+        """Return True if any solid block touches the rectangle."""
+        i0, j0, i1, j1 = self.cell_range(x, y, right, top)
+        if i0 > i1:
+            return False
+        cells = self.cells
+        cols = self.cols
+        for j in range(j0, j1 + 1):
+            row = j * cols
+            if any(cells[row + i0:row + i1 + 1]):
+                return True
+        return False
+
+    def sweep_x(self, x, y, right, top, dx):
+        """Sweep the box (x, y, right, top) by ``dx`` and find what it jumps over.
+
+        Only columns lying wholly between the box's start and end positions
+        are traversed (the caller tests the end position itself), nearest
+        first, one row slice search per row. Return the box's x where it
+        first overlaps a solid one of them, or None.
+        """
+        cw = self.cell_w
+        if dx > 0:
+            i0 = max(0, math.ceil((right - self.x) / cw))
+            i1 = min(self.cols - 1, math.floor((x + dx - self.x) / cw) - 1)
+        else:
+            i0 = max(0, math.ceil((right + dx - self.x) / cw))
+            i1 = min(self.cols - 1, math.floor((x - self.x) / cw) - 1)
+        if i0 > i1:
+            return None
+        _, j0, _, j1 = self.cell_range(x, y, right, top)
+        cells = self.cells
+        cols = self.cols
+        hit = None
+        for j in range(j0, j1 + 1):
+            row = j * cols
+            if dx > 0:
+                k = cells.find(1, row + i0, row + (hit if hit is not None else i1) + 1)
+                if k >= 0:
+                    hit = k - row
+            else:
+                k = cells.rfind(1, row + (hit if hit is not None else i0), row + i1 + 1)
+                if k >= 0:
+                    hit = k - row
+        if hit is None:
+            return None
+        # Leading edge just through the hit column
+        if dx > 0:
+            return self.x + (hit + 1) * cw - (right - x)
+        return self.x + hit * cw
+
+    def sweep_y(self, x, y, right, top, dy):
+        """Same as ``sweep_x`` along y: return the box's y at the first skipped solid row, or None."""
+        ch = self.cell_h
+        if dy > 0:
+            j0 = max(0, math.ceil((top - self.y) / ch))
+            j1 = min(self.rows - 1, math.floor((y + dy - self.y) / ch) - 1)
+            rows = range(j0, j1 + 1)
+        else:
+            j0 = max(0, math.ceil((top + dy - self.y) / ch))
+            j1 = min(self.rows - 1, math.floor((y - self.y) / ch) - 1)
+            rows = range(j1, j0 - 1, -1)
+        if j0 > j1:
+            return None
+        i0, _, i1, _ = self.cell_range(x, y, right, top)
+        if i0 > i1:
+            return None
+        cells = self.cells
+        cols = self.cols
+        for j in rows:
+            row = j * cols
+            if cells.find(1, row + i0, row + i1 + 1) >= 0:
+                if dy > 0:
+                    return self.y + (j + 1) * ch - (top - y)
+                return self.y + j * ch
+        return None
+
+    def carve(self, point, radius):
+        """Clear every block whose center lies within the circle.
+
+        Only rows and columns under the circle's bounding box are visited, and
+        each row's run of cells is cleared with one slice write. Return the
+        number of blocks destroyed.
+        """
+        if not self.alive or radius < 0:
+            return 0
+
+        cw, ch = self.cell_w, self.cell_h
+        # Circle center in cell units, measured from the first block's center
+        px = (point[0] - self.x) / cw - 0.5
+        py = (point[1] - self.y) / ch - 0.5
+
+        j0 = max(0, math.ceil(py - radius / ch))
+        j1 = min(self.rows - 1, math.floor(py + radius / ch))
+        destroyed = 0
+        for j in range(j0, j1 + 1):
+            dy = (j - py) * ch
+            span = math.sqrt(max(0.0, radius * radius - dy * dy)) / cw
+            i0 = max(0, math.ceil(px - span))
+            i1 = min(self.cols - 1, math.floor(px + span))
+            if i0 <= i1:
+                destroyed += self.clear_span(j, i0, i1)
+        return destroyed
+
+
+def stage_wall_rects(wall_defs, width, height, thickness):
+    """Map normalized ``(nx, ny, nw, nh)`` wall definitions onto a stage size.
+
+    A zero width or height means a thin wall of ``thickness`` pixels.
+    """
+    return [
+        (
+            width * nx, height * ny,
+            width * nw if nw > 0 else thickness,
+            height * nh if nh > 0 else thickness,
+        )
+        for nx, ny, nw, nh in wall_defs
+    ]
+
+
+def resample(old, new):
+    """Carry craters from ``old`` into ``new`` where both cover the stage.
+
+    Each new cell takes the state of the old cell under its center; cells
+    outside the old grid stay solid. Both grids must already be placed.
+    """
+    if old.alive == old.cols * old.rows:
+        return  # nothing carved
+
+    def lookup(count, origin, size, old_origin, old_size, old_count):
+        mapping = []
+        for k in range(count):
+            idx = math.floor((origin + (k + 0.5) * size - old_origin) / old_size)
+            mapping.append(idx if 0 <= idx < old_count else -1)
+        return mapping
+
+    col_map = lookup(new.cols, new.x, new.cell_w, old.x, old.cell_w, old.cols)
+    row_map = lookup(new.rows, new.y, new.cell_h, old.y, old.cell_h, old.rows)
+    for j, old_j in enumerate(row_map):
+        if old_j < 0:
+            continue
+        old_row = old.cells[old_j * old.cols:(old_j + 1) * old.cols]
+        if all(old_row):
+            continue
+        row = j * new.cols
+        for i, old_i in enumerate(col_map):
+            if old_i >= 0 and not old_row[old_i] and new.cells[row + i]:
+                new.cells[row + i] = 0
+                new.alive -= 1
+    new.version += 1
+
+
+def radial_gradient(cols, rows, block_size, width, height):
+    """Return an RGBA byte buffer with the wall's brown-to-green gradient.
+
+    Center blocks are brown and blocks at the edge of the wall are green,
+    matching the colors the old per-block widgets used.
+    """
+    pixels = bytearray(cols * rows * 4)
+    cx = width / 2
+    cy = height / 2
+    max_dist = math.sqrt(cx * cx + cy * cy) or 1  # safeguard
+
+    half = block_size / 2
+    i = 0
+    for j in range(rows):
+        dy = j * block_size + half - cy
+        for col in range(cols):
+            dx = col * block_size + half - cx
+            edge_factor = min(1.0, math.sqrt(dx * dx + dy * dy) / max_dist)  # 0=center, 1=edge
+            pixels[i] = int((0.4 * (1 - edge_factor) + 0.1 * edge_factor) * 255)
+            pixels[i + 1] = int((0.25 * (1 - edge_factor) + 0.6 * edge_factor) * 255)
+            pixels[i + 2] = int(0.1 * 255)
+            pixels[i + 3] = 255
+            i += 4
+    return pixels
+
+
+class TerrainIndex:
+    """Uniform-grid broadphase over a stage's terrain grids.
+
+    Each grid is hashed into every coarse bucket its bounding box touches, so
+    a query only returns grids near the queried rectangle. Per-block tests
+    then read the grid's live cells, so they always reflect carved craters.
+    """
+    def __init__(self, grids=(), cell_size=64):
+        self.cell_size = max(1, cell_size)
+        self.grids = list(grids)
+        # Largest block size; callers pad circle queries by it
+        self.block_pad = max((grid.block_size for grid in self.grids), default=0)
+        self.buckets = {}
+        # (i0, j0, i1, j1) bucket range of each grid, in ``grids`` order
+        self.grid_buckets = []
+        for grid in self.grids:
+            i0, j0, i1, j1 = self._bucket_range(*grid.bounds())
+            self.grid_buckets.append((i0, j0, i1, j1))
+            for i in range(i0, i1 + 1):
+                for j in range(j0, j1 + 1):
+                    self.buckets.setdefault((i, j), []).append(grid)
+
+    def _bucket_range(self, x, y, right, top):
+        cs = self.cell_size
+        return int(x // cs), int(y // cs), int(right // cs), int(top // cs)
+
+    def query(self, x, y, right, top):
+        """Return live grids whose bucket overlaps the rectangle, without duplicates."""
+        i0, j0, i1, j1 = self._bucket_range(x, y, right, top)
+        found = []
+        seen = set()
+        for i in range(i0, i1 + 1):
+            for j in range(j0, j1 + 1):
+                for grid in self.buckets.get((i, j), ()):
+                    if id(grid) not in seen and grid.alive:
+                        seen.add(id(grid))
+                        found.append(grid)
+        return found
@@ -0,0 +1,57 @@
+"""Compile stage JSON files into the binary ``.kks`` form the game maps at runtime.
+
+Each stage is pre-rasterized at the reference resolutions in
+``stage_format.REFERENCE_RESOLUTIONS`` (or the ``--resolution`` values), so
+entering a stage at one of those sizes copies its terrain out of the file
+instead of computing it. Run after editing any ``source/stages/*.json``.
+
+Usage::
+
+    python tools/compile_stages.py
+    python tools/compile_stages.py stage1_1 --resolution 2340x1080@2.75
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "source"))
+
+import stage_format  # noqa: E402
+
+
+def parse_resolution(text):
+    """``"1920x1080"`` or ``"2400x1080@2.625"`` -> (width, height, density)."""
+    size, _, density = text.partition("@")
+    width, height = size.lower().split("x")
+    return int(width), int(height), float(density or 1.0)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("stages", nargs="*", help="stage names (default: every stages/*.json)")
+    parser.add_argument("--resolution", action="append", type=parse_resolution,
+                        help="WIDTHxHEIGHT[@DENSITY], repeatable (default: the reference set)")
+    parser.add_argument("--directory", default=stage_format.STAGE_DIR)
+    args = parser.parse_args(argv)
+
+    names = args.stages or sorted(
+        os.path.splitext(os.path.basename(path))[0]
+        for path in glob.glob(os.path.join(args.directory, "*.json"))
+    )
+    resolutions = args.resolution or stage_format.REFERENCE_RESOLUTIONS
+    for name in names:
+        start = time.perf_counter()
+        with open(os.path.join(args.directory, f"{name}.json"), encoding="utf-8") as f:
+            stage = stage_format.StageData.from_json(name, f.read())
+        data = stage_format.compile_stage(stage, resolutions)
+        with open(os.path.join(args.directory, f"{name}.kks"), "wb") as f:
+            f.write(data)
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"{name}: {len(stage.walls)} walls x {len(resolutions)} sizes, {len(data) // 1024} KiB in {elapsed:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()